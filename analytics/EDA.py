@@ -49,4 +49,15 @@ def basic_eda(df):
             print(f"  Top 5 values:\n{df[col].value_counts().head()}")
 
 # Run and print the EDA summary
-basic_eda(df)
\ No newline at end of file
+basic_eda(df)
+
+# %%
+# Same summary computed inside Postgres (analytics/profiler.py): one aggregate
+# query, only the statistics come back. Use it for tables too large to pull into pandas.
+from analytics.profiler import profile_table, print_profile
+
+profile = profile_table("analytics.analytics_single_prop", columns=columns_to_analyze)
+print_profile(profile)
+
+# Every column of the staging model
+# print_profile(profile_table("stg.stg__property_listings"))
@@ -0,0 +1,167 @@
+# %%
+# profiler.py
+# Column profiles computed inside Postgres: one aggregate query per table,
+# so only the statistics cross the wire (not the rows).
+#
+#   from analytics.profiler import profile_table, print_profile
+#   profile = profile_table("stg.stg__property_listings")
+#   print_profile(profile)
+#
+# - numeric columns: mean, std, min, 25/50/75% (percentile_cont), max
+# - date / timestamp columns: min, median (percentile_disc), max
+# - every column: non-null count, missing, count(distinct)
+# - top values: approximate, from the planner statistics (pg_stats) kept by ANALYZE
+import pandas as pd
+
+from etl.loader import get_psycopg2_conn
+
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "numeric", "real", "double precision"}
+DATE_TYPES = {"date", "timestamp without time zone", "timestamp with time zone"}
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _split_table(table):
+    schema, _, name = table.rpartition(".")
+    return schema or "public", name
+
+
+def table_columns(cur, table, columns=None):
+    schema, name = _split_table(table)
+    cur.execute(
+        """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (schema, name),
+    )
+    found = cur.fetchall()
+    if columns:
+        wanted = set(columns)
+        found = [(c, t) for c, t in found if c in wanted]
+    if not found:
+        raise ValueError(f"No matching columns found for {table}")
+    return found
+
+
+def build_profile_query(table, columns, distinct=True):
+    """
+    Single SELECT with every aggregate for every column.
+    Returns (sql, [(column, stat), ...]) describing the result columns in order.
+    """
+    schema, name = _split_table(table)
+    select, layout = ["count(*)"], [(None, "rows")]
+    for col, dtype in columns:
+        q = _quote(col)
+        select.append(f"count({q})")
+        layout.append((col, "count"))
+        if distinct:
+            select.append(f"count(DISTINCT {q})")
+            layout.append((col, "unique"))
+        if dtype in NUMERIC_TYPES:
+            select += [
+                f"avg({q})::float8",
+                f"stddev_samp({q})::float8",
+                f"min({q})::float8",
+                f"percentile_cont(ARRAY{QUANTILES}) WITHIN GROUP (ORDER BY {q})",
+                f"max({q})::float8",
+            ]
+            layout += [(col, "mean"), (col, "std"), (col, "min"), (col, "quantiles"), (col, "max")]
+        elif dtype in DATE_TYPES:
+            select += [
+                f"min({q})",
+                f"percentile_disc(0.5) WITHIN GROUP (ORDER BY {q})",
+                f"max({q})",
+            ]
+            layout += [(col, "min"), (col, "50%"), (col, "max")]
+    sql = f"SELECT {', '.join(select)} FROM {_quote(schema)}.{_quote(name)}"
+    return sql, layout
+
+
+def approx_top_values(cur, table, columns, top_k=5):
+    """
+    {column: [(value, approx_share), ...]} from pg_stats.most_common_vals.
+    Empty for columns ANALYZE has no common values for (e.g. unique keys).
+    """
+    schema, name = _split_table(table)
+    cur.execute(
+        """
+        SELECT attname, most_common_vals::text::text[], most_common_freqs
+        FROM pg_stats
+        WHERE schemaname = %s AND tablename = %s AND attname = ANY(%s)
+        """,
+        (schema, name, list(columns)),
+    )
+    top = {}
+    for col, values, freqs in cur.fetchall():
+        if values:
+            top[col] = list(zip(values, freqs))[:top_k]
+    return top
+
+
+def profile_table(table, columns=None, top_k=5, distinct=True, analyze=False) -> pd.DataFrame:
+    """
+    Profiles a table (optionally only some columns) with one aggregate query.
+    Returns one row per column: type, count, missing, unique, mean, std, min,
+    25%, 50%, 75%, max and approximate top values.
+    analyze=True refreshes the planner statistics used for top values first.
+    """
+    conn = get_psycopg2_conn()
+    try:
+        with conn.cursor() as cur:
+            cols = table_columns(cur, table, columns)
+            if analyze:
+                schema, name = _split_table(table)
+                cur.execute(f"ANALYZE {_quote(schema)}.{_quote(name)}")
+            sql, layout = build_profile_query(table, cols, distinct=distinct)
+            cur.execute(sql)
+            values = cur.fetchone()
+            top = approx_top_values(cur, table, [c for c, _ in cols], top_k) if top_k else {}
+        conn.commit()
+    finally:
+        conn.close()
+
+    total_rows = values[0]
+    stats = {col: {"column": col, "type": dtype} for col, dtype in cols}
+    for (col, stat), value in zip(layout[1:], values[1:]):
+        if stat == "quantiles":
+            value = value or [None] * len(QUANTILES)
+            for q, v in zip(QUANTILES, value):
+                stats[col][f"{int(q * 100)}%"] = v
+        else:
+            stats[col][stat] = value
+    for col in stats:
+        stats[col]["missing"] = total_rows - stats[col]["count"]
+        stats[col]["top_values"] = top.get(col, [])
+
+    order = ["column", "type", "count", "missing", "unique", "mean", "std",
+             "min", "25%", "50%", "75%", "max", "top_values"]
+    profile = pd.DataFrame(list(stats.values()))
+    profile = profile[[c for c in order if c in profile.columns]]
+    profile.attrs["table"] = table
+    profile.attrs["rows"] = total_rows
+    return profile
+
+
+def print_profile(profile: pd.DataFrame):
+    """
+    Terminal-friendly summary, same layout as analytics/EDA.py basic_eda().
+    """
+    print(f"📋 {profile.attrs.get('table', '')} — {profile.attrs.get('rows', 0):,} rows")
+    for _, row in profile.iterrows():
+        print(f"\nColumn: {row['column']}")
+        print(f"  Type: {row['type']}")
+        print(f"  Missing: {row['missing']}")
+        if "unique" in row:
+            print(f"  Unique: {row['unique']}")
+        for stat in ["mean", "std", "min", "25%", "50%", "75%", "max"]:
+            if stat in row and pd.notna(row[stat]):
+                print(f"  {stat.capitalize()}: {row[stat]}")
+        if row["top_values"]:
+            tops = ", ".join(f"{v} ({f:.1%})" for v, f in row["top_values"])
+            print(f"  Top values (approx): {tops}")
@@ -0,0 +1,231 @@
+# %%
+# underwriting.py
+# Vectorized underwriting for every lead across a batch of scenarios.
+#
+#   from analytics.underwriting import load_candidates, scenario_grid, underwrite, to_frame
+#   props = load_candidates()
+#   scenarios = scenario_grid(rehab_per_sqft=[25, 50, 75], interest_rate=[0.065, 0.075])
+#   results = underwrite(props, scenarios)      # {metric: (n_scenarios, n_properties) array}
+#   df = to_frame(results, props, scenarios)
+#
+#   python -m analytics.underwriting --load     # score stg__property_listings, load results via COPY
+#
+# Properties are NumPy arrays over building_sqft, mls_amount, est_value and
+# total_loan_balance; scenario parameters are arrays too, and every metric is
+# computed for all (scenario, property) pairs at once by broadcasting.
+#
+#   rehab_cost   = building_sqft * rehab_per_sqft
+#   arv          = est_value + building_sqft * value_add_per_sqft
+#   mao          = arv * mao_pct - rehab_cost                  (max allowable offer)
+#   flip_profit  = arv * (1 - selling_cost_pct) - purchase - closing - rehab_cost
+#   monthly rent = arv * rent_to_value, cash flow after expense_ratio and the P&I payment
+#                  on purchase * (1 - down_payment_pct); purchase price = mls_amount
+import time
+import itertools
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# One scenario; any parameter can be swept with scenario_grid()
+DEFAULT_SCENARIO = {
+    "rehab_per_sqft": 35.0,        # rehab budget, $ per building sqft
+    "value_add_per_sqft": 50.0,    # target $/sqft increase after rehab
+    "mao_pct": 0.70,               # 70% rule
+    "rent_to_value": 0.0075,       # monthly rent as a share of ARV
+    "expense_ratio": 0.45,         # taxes, insurance, vacancy, maintenance, management
+    "interest_rate": 0.07,
+    "loan_term_years": 30.0,
+    "down_payment_pct": 0.25,
+    "closing_cost_pct": 0.03,
+    "selling_cost_pct": 0.08,
+}
+
+PROPERTY_COLS = ["building_sqft", "mls_amount", "est_value", "total_loan_balance"]
+ID_COLS = ["apn", "address", "zip"]
+
+DEFAULT_CANDIDATES_QUERY = """
+    select apn, address, zip, building_sqft, mls_amount, est_value, total_loan_balance
+    from stg.stg__property_listings
+    where mls_amount > 0
+"""
+
+
+def scenario_grid(**params) -> pd.DataFrame:
+    """
+    Every combination of the given parameter values (scalars or lists);
+    parameters not given keep their DEFAULT_SCENARIO value.
+    """
+    unknown = set(params) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {', '.join(sorted(unknown))}")
+    values = {
+        name: np.atleast_1d(params.get(name, default)).astype(float).tolist()
+        for name, default in DEFAULT_SCENARIO.items()
+    }
+    rows = list(itertools.product(*values.values()))
+    scenarios = pd.DataFrame(rows, columns=list(values))
+    scenarios.index.name = "scenario_id"
+    return scenarios
+
+
+def property_arrays(df: pd.DataFrame) -> dict:
+    """
+    {column: float64 array} for PROPERTY_COLS (missing values become NaN).
+    total_loan_balance falls back to the sum of loan_1..4_balance.
+    """
+    if "total_loan_balance" not in df.columns:
+        loan_cols = [c for c in df.columns if c.startswith("loan_") and c.endswith("_balance")]
+        total = sum(pd.to_numeric(df[c], errors="coerce").fillna(0) for c in loan_cols)
+        df = df.assign(total_loan_balance=total if loan_cols else 0.0)
+    return {
+        col: pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        for col in PROPERTY_COLS
+    }
+
+
+def monthly_payment(principal, annual_rate, term_years):
+    """
+    Fully amortizing monthly P&I; broadcasts over array inputs.
+    """
+    # As arrays, so a scalar zero rate divides to NaN (handled below) instead of raising
+    r = np.asarray(annual_rate, dtype="float64") / 12
+    n = np.asarray(term_years, dtype="float64") * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amortizing = principal * r / (1 - (1 + r) ** -n)
+    return np.where(r == 0, principal / n, amortizing)
+
+
+def underwrite(props, scenarios: pd.DataFrame) -> dict:
+    """
+    Computes every metric for every (scenario, property) pair.
+    props: DataFrame or property_arrays() dict. Returns {metric: array of shape
+    (n_scenarios, n_properties)}.
+    """
+    if isinstance(props, pd.DataFrame):
+        props = property_arrays(props)
+    # Properties along axis 1, scenarios along axis 0
+    sqft = props["building_sqft"][None, :]
+    purchase = props["mls_amount"][None, :]
+    est_value = props["est_value"][None, :]
+    liens = props["total_loan_balance"][None, :]
+    s = {name: scenarios[name].to_numpy(dtype="float64")[:, None] for name in DEFAULT_SCENARIO}
+
+    rehab_cost = sqft * s["rehab_per_sqft"]
+    arv = est_value + sqft * s["value_add_per_sqft"]
+    mao = arv * s["mao_pct"] - rehab_cost
+    closing = purchase * s["closing_cost_pct"]
+    flip_profit = arv * (1 - s["selling_cost_pct"]) - purchase - closing - rehab_cost
+
+    loan = purchase * (1 - s["down_payment_pct"])
+    payment = monthly_payment(loan, s["interest_rate"], s["loan_term_years"])
+    rent = arv * s["rent_to_value"]
+    noi = rent * (1 - s["expense_ratio"])
+    cash_flow = noi - payment
+    cash_invested = purchase * s["down_payment_pct"] + closing + rehab_cost
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cash_on_cash = np.where(cash_invested > 0, 12 * cash_flow / cash_invested, np.nan)
+        cap_rate = np.where(purchase + rehab_cost > 0, 12 * noi / (purchase + rehab_cost), np.nan)
+
+    return {
+        "rehab_cost": rehab_cost,
+        "arv": arv,
+        "mao": mao,
+        "offer_gap": mao - purchase,
+        "flip_profit": flip_profit,
+        "monthly_rent": rent,
+        "monthly_payment": payment,
+        "monthly_cash_flow": cash_flow,
+        "cash_invested": cash_invested,
+        "cash_on_cash": cash_on_cash,
+        "cap_rate": cap_rate,
+        "deal_flag": mao >= purchase,
+        # Seller can clear their liens at our max offer (matters for short sales / subject-to)
+        "mao_covers_liens": mao >= liens,
+    }
+
+
+def to_frame(results: dict, props: pd.DataFrame, scenarios: pd.DataFrame, deals_only=False) -> pd.DataFrame:
+    """
+    Long DataFrame: one row per (scenario_id, property) with the ID_COLS
+    present in props and every metric. deals_only keeps rows where mao >= mls_amount.
+    """
+    n_scenarios, n_props = results["mao"].shape
+    frame = {"scenario_id": np.repeat(scenarios.index.to_numpy(), n_props)}
+    for col in ID_COLS:
+        if col in props.columns:
+            frame[col] = np.tile(props[col].to_numpy(), n_scenarios)
+    for name, values in results.items():
+        frame[name] = values.ravel()
+    df = pd.DataFrame(frame)
+    if deals_only:
+        df = df[df["deal_flag"]].reset_index(drop=True)
+    return df
+
+
+def load_candidates(query=DEFAULT_CANDIDATES_QUERY) -> pd.DataFrame:
+    """
+    Reads the leads to underwrite through the COPY read path.
+    """
+    from etl.loader import copy_query_to_arrow
+
+    return copy_query_to_arrow(query).to_pandas()
+
+
+def _pg_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "bigint"
+    if pd.api.types.is_float_dtype(dtype):
+        return "double precision"
+    return "text"
+
+
+def load_underwriting(df: pd.DataFrame, scenarios: pd.DataFrame, schema="stg", table_name="underwriting"):
+    """
+    Recreates schema.table_name (results) and schema.table_name_scenarios
+    (parameters per scenario_id) and bulk-loads both with load_dataframe (COPY).
+    """
+    from etl.loader import execute_sql, load_dataframe
+
+    for frame, name in ((df, table_name), (scenarios.reset_index(), f"{table_name}_scenarios")):
+        columns = ", ".join(f"{col} {_pg_type(dtype)}" for col, dtype in frame.dtypes.items())
+        execute_sql(f"""
+            CREATE SCHEMA IF NOT EXISTS {schema};
+            DROP TABLE IF EXISTS {schema}.{name};
+            CREATE TABLE {schema}.{name} ({columns});
+        """)
+        load_dataframe(df=frame, table_name=name, schema=schema, method="append")
+    print(f"✅ Loaded {len(df)} underwriting rows into {schema}.{table_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Underwrite every lead across a scenario grid")
+    parser.add_argument("--rehab-per-sqft", type=float, nargs="+", default=[25, 35, 50])
+    parser.add_argument("--value-add-per-sqft", type=float, nargs="+", default=[DEFAULT_SCENARIO["value_add_per_sqft"]])
+    parser.add_argument("--interest-rate", type=float, nargs="+", default=[0.065, 0.07, 0.075])
+    parser.add_argument("--deals-only", action="store_true")
+    parser.add_argument("--load", action="store_true", help="load results into stg.underwriting")
+    args = parser.parse_args()
+
+    props = load_candidates()
+    scenarios = scenario_grid(
+        rehab_per_sqft=args.rehab_per_sqft,
+        value_add_per_sqft=args.value_add_per_sqft,
+        interest_rate=args.interest_rate,
+    )
+    started = time.perf_counter()
+    results = underwrite(props, scenarios)
+    elapsed = time.perf_counter() - started
+    print(f"🧮 Underwrote {len(props):,} leads x {len(scenarios)} scenarios in {elapsed:.3f}s")
+
+    df = to_frame(results, props, scenarios, deals_only=args.deals_only)
+    print(f"💰 {int(results['deal_flag'].any(axis=0).sum()):,} leads meet MAO in at least one scenario")
+    if args.load:
+        load_underwriting(df, scenarios)
+
+
+if __name__ == "__main__":
+    main()
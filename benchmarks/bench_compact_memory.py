@@ -0,0 +1,44 @@
+# %%
+# bench_compact_memory.py
+# Memory of the cleaned extract: default object output vs clean_raw_dataframe(compact=True).
+#
+#   python -m benchmarks.bench_compact_memory --rows 500000
+import time
+import argparse
+import warnings
+
+from benchmarks.generate_extract import generate_chunk, CHUNK_ROWS
+from etl.transform import clean_raw_dataframe
+
+import pandas as pd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cleaned-frame memory: object vs compact")
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    raw = pd.concat(
+        [generate_chunk(min(CHUNK_ROWS, args.rows - start), seed=i, start_id=start)
+         for i, start in enumerate(range(0, args.rows, CHUNK_ROWS))],
+        ignore_index=True,
+    )
+    raw_mb = raw.memory_usage(deep=True).sum() / 1e6
+    print(f"🧪 {args.rows:,} synthetic rows, raw string frame: {raw_mb:,.1f} MB")
+
+    results = {}
+    for label, compact in (("object (default)", False), ("compact", True)):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            start = time.perf_counter()
+            df = clean_raw_dataframe(raw.copy(), compact=compact)
+            elapsed = time.perf_counter() - start
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        results[label] = mb
+        print(f"   {label:<18} {mb:10,.1f} MB  {mb * 1e6 / len(df):8,.0f} B/row  clean {elapsed:6.2f}s")
+
+    print(f"📉 compact uses {results['compact'] / results['object (default)']:.0%} of the object frame")
+
+
+if __name__ == "__main__":
+    main()
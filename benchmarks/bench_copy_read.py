@@ -0,0 +1,75 @@
+# %%
+# bench_copy_read.py
+# Compares run_query (pd.read_sql) with copy_query_to_arrow (COPY TO STDOUT)
+# on a generated table of --rows rows (default 1M).
+#
+#   python -m benchmarks.bench_copy_read --rows 1000000
+#
+# Needs the Postgres connection from .env; creates bench.copy_read (dropped
+# afterwards unless --keep).
+import argparse
+import time
+
+from etl.loader import execute_sql, run_query, copy_query_to_arrow, arrow_to_pandas
+
+BENCH_TABLE = "bench.copy_read"
+
+
+def create_bench_table(rows):
+    # Same shape as the export: money, counts, dates, flags and free text
+    execute_sql(f"""
+        CREATE SCHEMA IF NOT EXISTS bench;
+        DROP TABLE IF EXISTS {BENCH_TABLE};
+        CREATE TABLE {BENCH_TABLE} AS
+        SELECT
+            g AS id,
+            (random() * 500000)::numeric(12, 2) AS mls_amount,
+            (random() * 600000)::numeric(12, 2) AS est_value,
+            (1 + random() * 5)::int AS bedrooms,
+            (800 + random() * 3000)::int AS building_sqft,
+            date '2015-01-01' + (random() * 3650)::int AS last_sale_date,
+            CASE WHEN g % 7 = 0 THEN NULL ELSE date '2025-01-01' + (g % 365) END AS mls_date,
+            g % 3 = 0 AS is_vacant,
+            'APN-' || lpad(g::text, 10, '0') AS apn,
+            g || ' Example St' AS address,
+            (89100 + g % 60)::text AS zip
+        FROM generate_series(1, {rows}) AS g;
+        ANALYZE {BENCH_TABLE};
+    """)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<32} {elapsed:8.2f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="COPY vs read_sql read benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the bench table")
+    args = parser.parse_args()
+
+    print(f"🏗 Creating {BENCH_TABLE} with {args.rows:,} rows")
+    create_bench_table(args.rows)
+    query = f"SELECT * FROM {BENCH_TABLE}"
+
+    try:
+        print("⏱ Timings")
+        df_sql, t_sql = timed("run_query (pd.read_sql)", lambda: run_query(query))
+        table, t_copy = timed("copy_query_to_arrow", lambda: copy_query_to_arrow(query))
+        df_arrow, t_view = timed("arrow_to_pandas (view)", lambda: arrow_to_pandas(table))
+
+        assert len(df_sql) == table.num_rows == len(df_arrow) == args.rows
+        print(f"🚀 COPY + Arrow speedup: {t_sql / (t_copy + t_view):.1f}x")
+        print(f"   read_sql frame:  {df_sql.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+        print(f"   Arrow table:     {table.nbytes / 1e6:8.1f} MB")
+    finally:
+        if not args.keep:
+            execute_sql(f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# %%
+# bench_startup.py
+# Startup time of the main.py CLI per subcommand: interpreter start, `import main`,
+# argument parsing and every module the command's handler imports before it does
+# any work (HANDLER_IMPORTS, lazy imports included), checked against
+# CLI_STARTUP_BUDGET_MS.
+#
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --runs 10 --budget-ms 800
+#
+# Also fails if
+#   - importing main.py pulls in a heavy module (pandas, SQLAlchemy, psycopg2, ...):
+#     those belong inside the command handlers;
+#   - any command's import path loads the Google Sheets stack (gspread,
+#     oauth2client, ...): only an actual Sheets export should pay for it.
+# Exits with status 1 when over budget, so it can gate cron / CI changes.
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+from config.paths import PROJECT_ROOT, CLI_STARTUP_BUDGET_MS
+
+HEAVY_MODULES = [
+    "pandas", "numpy", "pyarrow", "sqlalchemy", "psycopg2",
+    "gspread", "gspread_dataframe", "gspread_formatting", "oauth2client",
+    "requests", "bs4",
+]
+SHEETS_MODULES = ["gspread", "gspread_dataframe", "gspread_formatting", "oauth2client"]
+
+# What each handler in main.py imports on its way to the first query / file read,
+# following the lazy imports inside the functions it calls. Keep in sync with
+# the cmd_* handlers (tests/test_bench_startup.py checks the direct ones).
+HANDLER_IMPORTS = {
+    "run": ["etl.pipeline", "etl.sinks", "etl.extract", "etl.transform", "etl.loader",
+            "etl.export_fanout", "etl.gsheet", "etl.export_cache"],
+    "extract": ["etl.extract"],
+    "load": ["etl.watcher", "etl.pipeline", "etl.metrics", "etl.extract", "etl.transform", "etl.loader"],
+    "dbt": ["subprocess", "config.paths"],
+    "export": ["etl.export_fanout", "etl.sinks", "etl.gsheet", "etl.loader", "etl.export_cache",
+               "etl.pipeline"],
+    "profile": ["analytics.profiler"],
+    "underwrite": ["analytics.underwriting", "etl.loader"],
+    "watch": ["etl.watcher", "config.paths", "etl.extract", "etl.transform", "etl.loader",
+              "etl.pipeline"],
+}
+
+# Required positional arguments, so parsing succeeds
+COMMAND_ARGS = {"profile": ["stg.stg__property_listings"]}
+
+
+def startup_code(command, report=()):
+    """Python source that starts `main.py <command>` up to the point its handler does work."""
+    imports = "; ".join(f"import {m}" for m in HANDLER_IMPORTS[command])
+    code = f"import sys, main; main.build_parser().parse_args({[command, *COMMAND_ARGS.get(command, [])]!r}); {imports}"
+    if report:
+        code += f"; print(' '.join(m for m in {list(report)!r} if m in sys.modules))"
+    return code
+
+
+def time_command(argv, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=PROJECT_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def loaded_modules(code, modules):
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return [m for m in out.split() if m in modules]
+
+
+def heavy_imports():
+    code = (
+        "import sys, main; main.build_parser(); "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    return loaded_modules(code, HEAVY_MODULES)
+
+
+def sheets_imports(command):
+    return loaded_modules(startup_code(command, SHEETS_MODULES), SHEETS_MODULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup time per subcommand")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=CLI_STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, PROJECT_ROOT)
+    from main import COMMANDS
+
+    interpreter = time_command(["-c", "pass"], args.runs)
+    print(f"🐍 bare interpreter: {interpreter:6.1f} ms (budget {args.budget_ms:.0f} ms per command)")
+
+    failed = False
+    for command in COMMANDS:
+        ms = time_command(["-c", startup_code(command)], args.runs)
+        over = ms > args.budget_ms
+        sheets = sheets_imports(command)
+        failed |= over or bool(sheets)
+        note = f"  ❌ loads the Sheets stack: {', '.join(sheets)}" if sheets else ""
+        print(f"   {'❌' if over else '✅'} {command:<11} {ms:6.1f} ms{note}")
+
+    loaded = heavy_imports()
+    if loaded:
+        failed = True
+        print(f"❌ import main loads heavy modules: {', '.join(loaded)}")
+    else:
+        print("✅ import main loads no heavy modules")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
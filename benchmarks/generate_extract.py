@@ -0,0 +1,210 @@
+# %%
+# generate_extract.py
+# Synthetic Propstream-shaped extracts for benchmarking.
+#
+#   python -m benchmarks.generate_extract --rows 100000 --format parquet --out data/bench
+#
+# Columns use the raw Propstream headers, so clean_raw_dataframe() maps them
+# to the same names as a real export (e.g. "MLS Agent E-Mail" -> mls_agent_email).
+# Values are strings, like pd.read_excel(dtype=str), and include blanks,
+# "n/a" variants and mixed date formats.
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Excel hard limit (header row included)
+EXCEL_MAX_ROWS = 1_048_576
+CHUNK_ROWS = 250_000
+
+CITIES = ["Las Vegas", "Henderson", "North Las Vegas", "Boulder City", "Mesquite"]
+PROPERTY_TYPES = [
+    "Single Family Residential", "Single Family Residential", "Single Family Residential",
+    "Condominium (Residential)", "Townhouse (Residential)", "Duplex (2 units, any combination)",
+    "Triplex (3 units, any combination)", "Quadruplex (4 units, any combination)",
+    "Mobile home", "Vacant Land (General)",
+]
+MLS_STATUSES = ["Active", "Active", "Active", "Pending", "Sold", "Expired", "Cancelled", "Withdrawn"]
+CONDITIONS = ["Excellent", "Good", "Average", "Fair", "Poor"]
+FIRST_NAMES = ["James", "Maria", "Robert", "Linda", "Michael", "Patricia", "David", "Jennifer", "Jose", "Susan"]
+LAST_NAMES = ["Smith", "Garcia", "Johnson", "Martinez", "Brown", "Lopez", "Davis", "Nguyen", "Wilson", "Lee"]
+STREETS = ["Desert Inn", "Flamingo", "Sahara", "Charleston", "Rainbow", "Tropicana", "Spring Mountain", "Warm Springs"]
+SUFFIXES = ["Rd", "Ave", "Blvd", "St", "Dr", "Ln", "Way"]
+BROKERAGES = ["Desert Realty", "Summit Homes", "Silver State Realty", "Red Rock Brokers", "Vegas Home Group"]
+NULL_TOKENS = ["", "n/a", "N/A", "NA", " "]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%-m/%-d/%y", "%Y-%m-%d %H:%M:%S"]
+
+MONEY_COLUMNS = {
+    # raw header: (low, high)
+    "Total Assessed Value": (40_000, 600_000),
+    "Assessed Improvement Value": (20_000, 400_000),
+    "Improvement to Tax Value": (10_000, 300_000),
+    "Last Sale Amount": (50_000, 700_000),
+    "Est. Remaining balance of Open Loans": (0, 500_000),
+    "Est. Value": (120_000, 900_000),
+    "Est. Equity": (-50_000, 600_000),
+    "MLS Amount": (90_000, 950_000),
+    "Lien Amount": (500, 60_000),
+    "PreFC Unpaid Balance": (20_000, 400_000),
+    "PreFC Default Amount": (1_000, 50_000),
+    "PreFC Auction Opening Bid": (20_000, 400_000),
+    "Loan 1 Balance": (0, 500_000),
+    "Loan 2 Balance": (0, 150_000),
+    "Loan 3 Balance": (0, 80_000),
+    "Loan 4 Balance": (0, 50_000),
+}
+RATE_COLUMNS = ["Loan 1 Rate", "Loan 2 Rate", "Loan 3 Rate", "Loan 4 Rate"]
+DATE_COLUMNS = {
+    # raw header: (start year, end year)
+    "Last Sale Date": (1990, 2025),
+    "Last Sale Recording Date": (1990, 2025),
+    "Prior Sale Date": (1980, 2020),
+    "Loan 1 Date": (2000, 2025),
+    "Loan 2 Date": (2000, 2025),
+    "Loan 3 Date": (2005, 2025),
+    "Loan 4 Date": (2010, 2025),
+    "MLS Date": (2024, 2026),
+    "Lien Date": (2010, 2025),
+    "BK Date": (2005, 2025),
+    "Divorce Date": (2005, 2025),
+    "Pre-FC Recording Date": (2015, 2025),
+    "Pre-FC Auction Date": (2020, 2026),
+    "Date Added to List": (2024, 2026),
+}
+# Share of blank / n/a cells per column group (sparse columns are mostly empty)
+SPARSE_COLUMNS = {
+    "Loan 2 Balance", "Loan 2 Rate", "Loan 2 Date", "Loan 3 Balance", "Loan 3 Rate", "Loan 3 Date",
+    "Loan 4 Balance", "Loan 4 Rate", "Loan 4 Date", "Lien Amount", "Lien Date", "BK Date",
+    "Divorce Date", "Pre-FC Recording Date", "Pre-FC Auction Date", "PreFC Unpaid Balance",
+    "PreFC Default Amount", "PreFC Auction Opening Bid", "Prior Sale Date",
+}
+
+
+def _with_nulls(rng, values, rate):
+    values = np.asarray(values, dtype=object)
+    mask = rng.random(len(values)) < rate
+    values[mask] = rng.choice(NULL_TOKENS, size=int(mask.sum()))
+    return values
+
+
+def _dates(rng, n, start_year, end_year):
+    start = np.datetime64(f"{start_year}-01-01")
+    days = (np.datetime64(f"{end_year}-12-31") - start).astype(int)
+    dates = pd.to_datetime(start + rng.integers(0, days, size=n).astype("timedelta64[D]"))
+    # Mixed formats, as in real exports that went through Excel
+    fmt_idx = rng.integers(0, len(DATE_FORMATS), size=n)
+    out = np.empty(n, dtype=object)
+    for i, fmt in enumerate(DATE_FORMATS):
+        sel = fmt_idx == i
+        out[sel] = dates[sel].strftime(fmt)
+    return out
+
+
+def _choice(rng, options, n):
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), size=n)]
+
+
+def generate_chunk(n, seed=0, start_id=0) -> pd.DataFrame:
+    """
+    One chunk of n synthetic Propstream rows with raw headers and string values.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start_id, start_id + n)
+    city = _choice(rng, CITIES, n)
+    building_sqft = rng.integers(450, 4800, size=n)
+    data = {
+        "Address": (
+            pd.Series(rng.integers(100, 99999, size=n)).astype(str)
+            + " " + pd.Series(_choice(rng, STREETS, n))
+            + " " + pd.Series(_choice(rng, SUFFIXES, n))
+        ).to_numpy(dtype=object),
+        "City": city,
+        "State": np.where(rng.random(n) < 0.995, "NV", "nv").astype(object),
+        "Zip": (89000 + rng.integers(1, 180, size=n)).astype(str).astype(object),
+        "County": np.full(n, "Clark", dtype=object),
+        "APN": np.char.add("APN-", np.char.zfill(ids.astype(str), 11)).astype(object),
+        "Property Type": _choice(rng, PROPERTY_TYPES, n),
+        "Bedrooms": _with_nulls(rng, rng.integers(1, 7, size=n).astype(str), 0.03),
+        "Total Bathrooms": _with_nulls(rng, (rng.integers(2, 9, size=n) / 2).astype(str), 0.03),
+        "Building Sqft": _with_nulls(rng, building_sqft.astype(str), 0.02),
+        "Lot Size Sqft": _with_nulls(rng, (building_sqft * rng.uniform(1.2, 12, size=n)).round().astype(int).astype(str), 0.05),
+        "Effective Year Built": _with_nulls(rng, rng.integers(1940, 2025, size=n).astype(str), 0.05),
+        "Total Condition": _with_nulls(rng, _choice(rng, CONDITIONS, n), 0.2),
+        "Total Open Loans": _with_nulls(rng, rng.integers(0, 5, size=n).astype(str), 0.02),
+        "Est. LoanToValue": _with_nulls(rng, rng.uniform(0, 110, size=n).round(2).astype(str), 0.05),
+        "MLS Status": _with_nulls(rng, _choice(rng, MLS_STATUSES, n), 0.1),
+        "MLS Agent Name": _with_nulls(rng, np.char.add(np.char.add(_choice(rng, FIRST_NAMES, n).astype(str), " "), _choice(rng, LAST_NAMES, n).astype(str)), 0.15),
+        "MLS Agent Phone": _with_nulls(rng, np.char.add("702-555-", np.char.zfill(rng.integers(0, 9999, size=n).astype(str), 4)), 0.15),
+        "MLS Agent E-Mail": _with_nulls(rng, np.char.add(np.char.add("agent", ids.astype(str)), "@example.com"), 0.2),
+        "MLS Brokerage Name": _with_nulls(rng, _choice(rng, BROKERAGES, n), 0.15),
+        "MLS Brokerage Phone": _with_nulls(rng, np.char.add("702-555-", np.char.zfill(rng.integers(0, 9999, size=n).astype(str), 4)), 0.2),
+        "Owner 1 First Name": _with_nulls(rng, _choice(rng, FIRST_NAMES, n), 0.05),
+        "Owner 1 Last Name": _with_nulls(rng, _choice(rng, LAST_NAMES, n), 0.05),
+        "Owner 1 E-Mail": _with_nulls(rng, np.char.add(np.char.add("owner", ids.astype(str)), "@example.com"), 0.6),
+        "Owner Occupied": _with_nulls(rng, _choice(rng, ["Yes", "No"], n), 0.05),
+        "Vacant": _with_nulls(rng, _choice(rng, ["Yes", "No", "No", "No"], n), 0.05),
+        "HOA Present": _with_nulls(rng, _choice(rng, ["Yes", "No"], n), 0.05),
+        "Mailing State": np.where(rng.random(n) < 0.85, "NV", _choice(rng, ["CA", "AZ", "UT", "TX"], n)).astype(object),
+    }
+    for col, (low, high) in MONEY_COLUMNS.items():
+        rate = 0.85 if col in SPARSE_COLUMNS else 0.05
+        data[col] = _with_nulls(rng, rng.integers(low, high, size=n).astype(str), rate)
+    for col in RATE_COLUMNS:
+        rate = 0.85 if col in SPARSE_COLUMNS else 0.1
+        data[col] = _with_nulls(rng, rng.uniform(2.5, 9.5, size=n).round(3).astype(str), rate)
+    for col, (start, end) in DATE_COLUMNS.items():
+        rate = 0.85 if col in SPARSE_COLUMNS else 0.08
+        data[col] = _with_nulls(rng, _dates(rng, n, start, end), rate)
+    return pd.DataFrame(data)
+
+
+def generate_extract(rows, out_dir, fmt="xlsx", seed=42, filename=None) -> str:
+    """
+    Writes a synthetic extract with `rows` rows and returns its path.
+    CSV and Parquet are written in chunks so 5M-row files don't need 5M rows in memory.
+    """
+    if fmt == "xlsx" and rows > EXCEL_MAX_ROWS - 1:
+        raise ValueError(f"XLSX holds at most {EXCEL_MAX_ROWS - 1:,} rows; use csv or parquet for {rows:,}")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, filename or f"synthetic_{rows}.{fmt}")
+
+    if fmt == "xlsx":
+        generate_chunk(rows, seed=seed).to_excel(path, index=False)
+    elif fmt == "csv":
+        for i, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            chunk = generate_chunk(min(CHUNK_ROWS, rows - start), seed=seed + i, start_id=start)
+            chunk.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+    elif fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for i, start in enumerate(range(0, rows, CHUNK_ROWS)):
+                chunk = generate_chunk(min(CHUNK_ROWS, rows - start), seed=seed + i, start_id=start)
+                table = pa.Table.from_pandas(chunk.astype(str), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use xlsx, csv or parquet.")
+
+    print(f"🧪 Generated {rows:,} synthetic rows → {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Propstream extract")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    parser.add_argument("--out", default=os.path.join("data", "bench"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate_extract(args.rows, args.out, fmt=args.format, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# %%
+# run_benchmarks.py
+# End-to-end benchmark suite on synthetic Propstream extracts.
+#
+#   python -m benchmarks.run_benchmarks --rows 10000 100000
+#   python -m benchmarks.run_benchmarks --rows 100000 --update-baseline
+#   python -m benchmarks.run_benchmarks --rows 100000 --skip-db
+#
+# Times load_latest_xlsx_by_modified_date, clean_raw_dataframe,
+# load_dataframe (into bench.prop_extract on the .env Postgres) and
+# export_and_process_data, then compares against benchmarks/baselines.json.
+# Exits with status 1 if any step is slower than baseline * (1 + tolerance).
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+from benchmarks.generate_extract import generate_extract, EXCEL_MAX_ROWS
+from etl import metrics
+from config.paths import METRICS_PATH
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+BENCH_SCHEMA = "bench"
+BENCH_TABLE = "prop_extract"
+
+
+def create_bench_table(df):
+    """
+    bench.prop_extract with the same columns/types as stg.prop_extract when it
+    exists, otherwise TEXT columns for every column of the cleaned frame.
+    """
+    from etl.loader import execute_sql, run_query
+
+    exists = run_query("SELECT to_regclass('stg.prop_extract') IS NOT NULL AS ok")["ok"].iloc[0]
+    execute_sql(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}; DROP TABLE IF EXISTS {BENCH_SCHEMA}.{BENCH_TABLE};")
+    if exists:
+        execute_sql(f"CREATE TABLE {BENCH_SCHEMA}.{BENCH_TABLE} (LIKE stg.prop_extract INCLUDING DEFAULTS);")
+        # Columns the synthetic extract has but the real table doesn't
+        existing = set(run_query(
+            f"SELECT column_name FROM information_schema.columns "
+            f"WHERE table_schema = '{BENCH_SCHEMA}' AND table_name = '{BENCH_TABLE}'"
+        )["column_name"])
+        for col in df.columns:
+            if col not in existing:
+                execute_sql(f"ALTER TABLE {BENCH_SCHEMA}.{BENCH_TABLE} ADD COLUMN {col} TEXT;")
+    else:
+        cols = ", ".join(f"{col} TEXT" for col in df.columns)
+        execute_sql(f"CREATE TABLE {BENCH_SCHEMA}.{BENCH_TABLE} ({cols});")
+
+
+def timed_step(results, rows, name, fn):
+    with metrics.span(f"bench.{name}") as span:
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        span.add(rows=rows)
+    results[f"{name}@{rows}"] = round(elapsed, 4)
+    print(f"   {name:<38} {elapsed:9.3f}s  ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    return value
+
+
+def run_suite(rows, skip_db=False):
+    import etl.extract as extract
+    from etl.transform import clean_raw_dataframe
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="re_bench_")
+    try:
+        print(f"\n📦 {rows:,} rows")
+        generate_extract(rows, work_dir, fmt="xlsx", filename="propstream_export.xlsx")
+
+        # load_latest_xlsx_by_modified_date reads the module-level DATA_DIR
+        original_dir = extract.DATA_DIR
+        extract.DATA_DIR = work_dir
+        try:
+            df_raw = timed_step(results, rows, "load_latest_xlsx_by_modified_date",
+                                extract.load_latest_xlsx_by_modified_date)
+        finally:
+            extract.DATA_DIR = original_dir
+
+        # compact=True like the pipeline: integer columns are written as 3, not "3.0"
+        df_clean = timed_step(results, rows, "clean_raw_dataframe",
+                              lambda: clean_raw_dataframe(df_raw, compact=True))
+
+        if not skip_db:
+            from etl.loader import load_dataframe, execute_sql, run_query
+            from etl.gsheet import export_and_process_data
+
+            create_bench_table(df_clean)
+            try:
+                timed_step(results, rows, "load_dataframe", lambda: load_dataframe(
+                    df=df_clean, table_name=BENCH_TABLE, schema=BENCH_SCHEMA, method="replace",
+                ))
+                # load_dataframe only prints COPY errors; a failed load must not pass as a fast one
+                loaded = run_query(f"SELECT count(*) AS n FROM {BENCH_SCHEMA}.{BENCH_TABLE}")["n"].iloc[0]
+                if loaded != rows:
+                    raise RuntimeError(f"load_dataframe loaded {loaded:,} of {rows:,} rows into "
+                                       f"{BENCH_SCHEMA}.{BENCH_TABLE}; timings are not valid")
+                timed_step(results, rows, "export_and_process_data", lambda: export_and_process_data(
+                    query=f"SELECT * FROM {BENCH_SCHEMA}.{BENCH_TABLE}", use_cache=False,
+                ))
+            finally:
+                execute_sql(f"DROP TABLE IF EXISTS {BENCH_SCHEMA}.{BENCH_TABLE};")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baselines, tolerance):
+    regressions, missing = [], []
+    print("\n📊 Against baseline")
+    for key, elapsed in sorted(results.items()):
+        base = baselines.get(key)
+        if base is None:
+            print(f"   {key:<48} {elapsed:9.3f}s  (no baseline)")
+            missing.append(key)
+            continue
+        change = (elapsed - base) / base if base else 0.0
+        flag = "❌" if change > tolerance else "✅"
+        print(f"   {flag} {key:<46} {elapsed:9.3f}s  vs {base:9.3f}s  ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(key)
+    if missing:
+        print(f"⚠️ {len(missing)} step(s) without a baseline; record them with --update-baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL benchmark suite")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--skip-db", action="store_true", help="only time the file + transform steps")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        if rows > EXCEL_MAX_ROWS - 1:
+            print(f"⚠️ Skipping {rows:,} rows: over the XLSX row limit")
+            continue
+        results.update(run_suite(rows, skip_db=args.skip_db))
+    # Keep benchmark spans out of the production run metrics
+    metrics.flush(path=os.path.join(os.path.dirname(METRICS_PATH), "bench_metrics.jsonl"), to_postgres=False)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline updated: {args.baseline}")
+        return
+
+    regressions = compare(results, baselines, args.tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s): {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
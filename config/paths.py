@@ -9,3 +9,32 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 FILENAME_DATE_FORMAT = "%Y%m%d"
 DEFAULT_EXTRACT_LABEL = "extract"
 PARQUET_ENABLED = True
+
+# Local export sink output (XLSX / Parquet / CSV instead of Google Sheets)
+EXPORT_DIR = os.path.join(PROJECT_ROOT, "exports")
+EXPORT_SINK = os.getenv("EXPORT_SINK", "gsheet")  # gsheet | file | memory
+
+# Listing status checker (Zillow) response cache
+STATUS_CACHE_PATH = os.path.join(DATA_DIR, "listing_status_cache.json")
+STATUS_CACHE_TTL_HOURS = 24
+
+# Export result cache (processed export frames stored as Parquet)
+EXPORT_CACHE_DIR = os.path.join(DATA_DIR, ".export_cache")
+EXPORT_CACHE_MAX_MB = 512
+EXPORT_CACHE_MAX_ENTRIES = 20
+# Tables up to this many rows also get an exact count(*) / max(xmin) in the freshness token
+EXPORT_CACHE_EXACT_MAX_ROWS = 200_000
+DBT_RUN_RESULTS_PATH = os.path.join(PROJECT_ROOT, "target", "run_results.json")
+
+# Stage-based pipeline runner state (fingerprints + stage outputs)
+PIPELINE_STATE_DIR = os.path.join(DATA_DIR, ".pipeline")
+
+# Run instrumentation (etl/metrics.py)
+METRICS_PATH = os.path.join(DATA_DIR, "metrics", "etl_run_metrics.jsonl")
+METRICS_TO_POSTGRES = os.getenv("METRICS_TO_POSTGRES", "0") == "1"
+
+# Watch-folder ingest (etl/watcher.py): fingerprints of already-loaded extracts
+WATCHER_STATE_PATH = os.path.join(DATA_DIR, ".watcher_state.json")
+
+# CLI startup budget per command, handler imports included (main.py, measured by benchmarks/bench_startup.py)
+CLI_STARTUP_BUDGET_MS = int(os.getenv("CLI_STARTUP_BUDGET_MS", "1000"))
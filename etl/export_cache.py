@@ -0,0 +1,224 @@
+# %%
+# export_cache.py
+# Cache for processed export frames, keyed on the query text plus a
+# freshness token for the tables it reads. If dbt hasn't rebuilt anything
+# since the last export, the processed frame comes straight from Parquet.
+#
+# Freshness token =
+#   dbt target/run_results.json generated_at (if present)
+#   + per table: relation OID (changes when dbt rebuilds a table)
+#     and insert/update/delete counters from pg_stat_user_tables
+#   + for tables up to EXPORT_CACHE_EXACT_MAX_ROWS (e.g. stg.stg__list_history):
+#     count(*) and max(xmin), which change as soon as a write commits
+# Unqualified table names are resolved through the search_path (to_regclass).
+# Queries whose tables can't be resolved bypass the cache.
+#
+# Limit: pg_stat_user_tables counters are updated asynchronously (up to a few
+# seconds after commit) and are zeroed by pg_stat_reset() or crash recovery.
+# A reset only causes a miss, but direct DML on a table larger than
+# EXPORT_CACHE_EXACT_MAX_ROWS can be served from cache for a few seconds after
+# it commits. dbt rebuilds are always seen (new OID / generated_at). Pass
+# use_cache=False right after writing to a large table.
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+import pandas as pd
+
+from config.paths import (
+    EXPORT_CACHE_DIR,
+    EXPORT_CACHE_MAX_MB,
+    EXPORT_CACHE_MAX_ENTRIES,
+    DBT_RUN_RESULTS_PATH,
+    EXPORT_CACHE_EXACT_MAX_ROWS,
+)
+
+TABLE_PATTERN = re.compile(r"\b(?:from|join)\s+([a-zA-Z_]\w*(?:\.[a-zA-Z_]\w*)?)", re.I)
+
+
+def tables_in_query(query: str):
+    """
+    Table names (schema-qualified or not) referenced after FROM / JOIN.
+    May include CTE names; those don't resolve in table_stats() and are ignored.
+    """
+    return sorted(set(TABLE_PATTERN.findall(query)))
+
+
+def dbt_run_timestamp(run_results_path=DBT_RUN_RESULTS_PATH):
+    """
+    generated_at from dbt's run_results.json, or None if dbt hasn't run here.
+    """
+    try:
+        with open(run_results_path) as f:
+            return json.load(f).get("metadata", {}).get("generated_at")
+    except (OSError, ValueError):
+        return None
+
+
+def table_stats(tables, exact_max_rows=EXPORT_CACHE_EXACT_MAX_ROWS):
+    """
+    {table: [oid, n_tup_ins, n_tup_upd, n_tup_del]} for each table (None if missing).
+    Small tables (up to exact_max_rows by the planner's estimate) get
+    count(*) and max(xmin) appended: unlike the statistics counters they are
+    visible as soon as a write commits.
+    """
+    from etl.loader import db_connection
+
+    sql = """
+        SELECT c.oid, coalesce(s.n_tup_ins, 0), coalesce(s.n_tup_upd, 0), coalesce(s.n_tup_del, 0),
+               c.oid::regclass::text, c.relkind, c.reltuples
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = to_regclass(%s)
+    """
+    stats = {}
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(sql, (table,))
+                row = cur.fetchone()
+                if not row:
+                    stats[table] = None
+                    continue
+                stat = list(row[:4])
+                relation, relkind, reltuples = row[4:]
+                if relkind in ("r", "p") and reltuples <= exact_max_rows:
+                    # relation is quoted by regclass::text
+                    cur.execute(f"SELECT count(*), coalesce(max(xmin::text::bigint), 0) FROM {relation}")
+                    stat += list(cur.fetchone())
+                stats[table] = stat
+        conn.rollback()
+    return stats
+
+
+def freshness_token(query: str, run_results_path=DBT_RUN_RESULTS_PATH):
+    """
+    JSON token that changes whenever the query's tables change.
+    None when no referenced table resolves (nothing to check freshness against).
+    """
+    stats = table_stats(tables_in_query(query))
+    if not any(stats.values()):
+        return None
+    token = {
+        "dbt_generated_at": dbt_run_timestamp(run_results_path),
+        "tables": {table: stat for table, stat in stats.items() if stat is not None},
+    }
+    return json.dumps(token, sort_keys=True, default=str)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportCache:
+    """
+    Parquet files under cache_dir, one per key. Least recently used entries
+    are evicted once the cache exceeds max_mb or max_entries.
+    Safe to use from several threads (etl.export_fanout): eviction is
+    serialized, and entries removed by another thread are skipped.
+    """
+
+    _evict_lock = threading.Lock()
+
+    def __init__(self, cache_dir=EXPORT_CACHE_DIR, max_mb=EXPORT_CACHE_MAX_MB,
+                 max_entries=EXPORT_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except FileNotFoundError:
+            return None  # evicted by another thread
+        except Exception as e:
+            print(f"⚠️ Dropping unreadable cache entry {path}: {e}")
+            _remove(path)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass
+        return df
+
+    def put(self, key, df):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"  # unique per writer thread
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not cache export frame: {e}")
+            _remove(tmp_path)
+            return
+        self.evict()
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)  # oldest first
+
+    def evict(self):
+        with self._evict_lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+                _, size, path = entries.pop(0)
+                _remove(path)
+                total -= size
+
+    def clear(self):
+        with self._evict_lock:
+            for _, _, path in self.entries():
+                _remove(path)
+
+
+def cached_export(query, build, cache=None, code_version=""):
+    """
+    Returns build() for the query, reusing the cached frame when the query,
+    code_version and freshness token all match a previous run.
+    """
+    cache = cache or ExportCache()
+    started = time.perf_counter()
+    token = freshness_token(query)
+    if token is None:
+        print("⚠️ Export cache bypassed: no tables resolved for the query")
+        return build()
+    key = cache.make_key(query, code_version, token)
+    df = cache.get(key)
+    if df is not None:
+        print(f"⚡ Export cache hit ({len(df)} rows, {time.perf_counter() - started:.2f}s)")
+        return df
+    df = build()
+    cache.put(key, df)
+    return df
@@ -0,0 +1,180 @@
+# %%
+# export_fanout.py
+# Exports several strategies (buy-boxes) concurrently.
+#
+#   python -m etl.export_fanout                          # every strategy in default_strategies()
+#   python -m etl.export_fanout --only multi_family --sink file
+#
+# Each StrategyExport is one query -> one tab. Strategies run on a thread pool:
+#   export_and_process_data(query) -> add_checkbox_column -> sink.create_tab / upload / format
+#   -> insert_uploaded_to_db (exported APNs go to stg.stg__list_history so they
+#      aren't exported again)
+# All workers share one pooled set of DB connections (loader.open_connection_pool)
+# and one export sink, so the Sheets client is authorized once for the whole run.
+# DB reads and Sheets calls are network-bound, so threads overlap them well;
+# total time is roughly the slowest strategy instead of the sum.
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from etl import metrics
+
+
+class StrategyExport:
+    def __init__(self, name, query, prefix=None, currency_cols=None, percent_cols=None,
+                 int_cols=None, border_after_cols=None, add_checkboxes=True):
+        self.name = name
+        self.query = query
+        self.prefix = prefix or name
+        self.currency_cols = currency_cols
+        self.percent_cols = percent_cols
+        self.int_cols = int_cols
+        self.border_after_cols = border_after_cols
+        self.add_checkboxes = add_checkboxes
+
+
+def default_strategies():
+    """
+    The buy-boxes built by dbt: single family (analytics_single_prop)
+    and multifamily (int__strategy_multi).
+    """
+    from etl.gsheet import DEFAULT_EXPORT_QUERY
+    from etl.pipeline import CURRENCY_COLS, INT_COLS, BORDER_AFTER_COLS
+
+    formatting = dict(
+        currency_cols=CURRENCY_COLS,
+        int_cols=INT_COLS,
+        border_after_cols=BORDER_AFTER_COLS,
+    )
+    return [
+        StrategyExport("single_family", DEFAULT_EXPORT_QUERY, prefix="Export", **formatting),
+        StrategyExport(
+            "multi_family",
+            """
+            select
+            m.*
+            FROM int.int__strategy_multi m
+            left join stg.stg__list_history h on m.apn = h.apn
+            where h.apn is null
+            ORDER BY m.total_score DESC
+            """,
+            prefix="Multi",
+            **formatting,
+        ),
+    ]
+
+
+def export_strategy(strategy, sink, use_cache=True, format_tab=True, record_history=True):
+    """
+    Reads, processes and uploads one strategy to its own tab, then formats the
+    tab while recording the exported APNs in stg.stg__list_history.
+    Returns a summary dict.
+    """
+    from etl.gsheet import export_and_process_data, add_checkbox_column
+    from etl.loader import insert_uploaded_to_db
+
+    started = time.perf_counter()
+    with metrics.span(f"export.{strategy.name}"):
+        df_final = add_checkbox_column(export_and_process_data(strategy.query, use_cache=use_cache))
+        tab_name = sink.create_tab(strategy.prefix)
+        sink.upload(df_final, tab_name)
+        # Formatting (Sheets API) and the history insert (Postgres) are independent
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = []
+            if format_tab:
+                futures.append(pool.submit(
+                    sink.format,
+                    df_final,
+                    tab_name,
+                    currency_cols=strategy.currency_cols,
+                    percent_cols=strategy.percent_cols,
+                    int_cols=strategy.int_cols,
+                    border_after_cols=strategy.border_after_cols,
+                    add_checkboxes=strategy.add_checkboxes,
+                ))
+            if record_history:
+                futures.append(pool.submit(insert_uploaded_to_db, df_final))
+            for future in futures:
+                future.result()
+    return {
+        "strategy": strategy.name,
+        "tab_name": tab_name,
+        "rows": len(df_final),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def export_strategies(strategies=None, sink=None, max_workers=4, use_cache=True, format_tabs=True,
+                      record_history=True):
+    """
+    Exports every strategy concurrently with a shared connection pool and sink.
+    Returns {strategy name: summary}. Failures are reported per strategy and
+    the first one is re-raised after the others have finished.
+    """
+    from etl.loader import open_connection_pool, close_connection_pool
+    from etl.sinks import get_export_sink, GSheetSink
+
+    strategies = strategies or default_strategies()
+    sink = sink or get_export_sink()
+    max_workers = max(1, min(max_workers, len(strategies)))
+
+    results, errors = {}, []
+    started = time.perf_counter()
+    open_connection_pool(max_workers)
+    try:
+        with metrics.span("export.fanout"):
+            if isinstance(sink, GSheetSink):
+                _ = sink.sheet  # authorize once before the workers start
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(export_strategy, s, sink, use_cache, format_tabs, record_history): s
+                    for s in strategies
+                }
+                for future in as_completed(futures):
+                    strategy = futures[future]
+                    try:
+                        results[strategy.name] = future.result()
+                        r = results[strategy.name]
+                        print(f"✅ {strategy.name}: {r['rows']} rows -> {r['tab_name']} ({r['seconds']}s)")
+                    except Exception as e:
+                        print(f"❌ {strategy.name} export failed: {e}")
+                        errors.append(e)
+    finally:
+        close_connection_pool()
+        metrics.flush()
+
+    print(f"📤 Exported {len(results)}/{len(strategies)} strategies in {time.perf_counter() - started:.1f}s")
+    if errors:
+        raise errors[0]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every strategy to its own tab concurrently")
+    parser.add_argument("--only", nargs="+", help="strategy names to export")
+    parser.add_argument("--sink", choices=["gsheet", "file", "memory"], default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-history", action="store_true", help="don't record exported APNs in stg__list_history")
+    args = parser.parse_args()
+
+    from etl.sinks import get_export_sink
+
+    strategies = default_strategies()
+    if args.only:
+        unknown = set(args.only) - {s.name for s in strategies}
+        if unknown:
+            parser.error(f"unknown strategies: {', '.join(sorted(unknown))}")
+        strategies = [s for s in strategies if s.name in args.only]
+
+    export_strategies(
+        strategies,
+        sink=get_export_sink(args.sink),
+        max_workers=args.workers,
+        use_cache=not args.no_cache,
+        record_history=not args.no_history,
+    )
+
+
+if __name__ == "__main__":
+    main()
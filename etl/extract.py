@@ -1,60 +1,99 @@
 # %%
 # Extract Functions
-import sys
+# Run from the project root (python main.py extract / python -m etl.extract)
+# so that config/ and etl/ are importable.
 import os
+import re
 import pandas as pd
 from datetime import datetime
 
-PROJECT_ROOT = "/Users/borismartinez/Documents/real-estate"
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
 from config.paths import DATA_DIR, FILENAME_DATE_FORMAT, DEFAULT_EXTRACT_LABEL, PARQUET_ENABLED
+from etl import metrics
 
 
-# --- Load the most recent XLSX (your original version) ---
-def load_latest_xlsx_by_modified_date(dtype=str) -> pd.DataFrame:
+# --- Rename an extract to the normalized <date>_extract.<ext> name ---
+def normalize_extract_path(path):
     """
-    Loads the most recently modified XLSX file from DATA_DIR.
-    Saves a .parquet version alongside it.
+    Renames an extract file to <YYYYMMDD>_<label>.<ext> based on its modified date.
+    If that name is taken (several extracts on one day), adds _2, _3, ...
+    The name is reserved with O_CREAT | O_EXCL before the rename, so concurrent
+    watcher workers never pick the same name and overwrite each other's file.
+    Returns (clean_path, extract_date).
     """
-    xlsx_files = [
-        os.path.join(DATA_DIR, f)
-        for f in os.listdir(DATA_DIR)
-        if f.endswith(".xlsx") and os.path.isfile(os.path.join(DATA_DIR, f))
-    ]
-    if not xlsx_files:
-        raise FileNotFoundError(f"No .xlsx files found in {DATA_DIR}")
-
-    latest_file = max(xlsx_files, key=os.path.getmtime)
-    modified_time = os.path.getmtime(latest_file)
-    extract_date = datetime.fromtimestamp(modified_time).date()
+    folder = os.path.dirname(path)
+    ext = os.path.splitext(path)[1].lower()
+    extract_date = datetime.fromtimestamp(os.path.getmtime(path)).date()
     date_str = extract_date.strftime(FILENAME_DATE_FORMAT)
 
-    clean_filename = f"{date_str}_{DEFAULT_EXTRACT_LABEL}.xlsx"
-    clean_path = os.path.join(DATA_DIR, clean_filename)
+    normalized = re.compile(rf"^\d{{8}}_{re.escape(DEFAULT_EXTRACT_LABEL)}(_\d+)?{re.escape(ext)}$")
+    if normalized.match(os.path.basename(path)):
+        return path, extract_date
 
-    if os.path.basename(latest_file) != clean_filename:
-        os.rename(latest_file, clean_path)
-        print(f"Renamed '{os.path.basename(latest_file)}' → '{clean_filename}'")
-    else:
-        clean_path = latest_file
+    clean_filename = f"{date_str}_{DEFAULT_EXTRACT_LABEL}{ext}"
+    suffix = 2
+    while True:
+        clean_path = os.path.join(folder, clean_filename)
+        try:
+            os.close(os.open(clean_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            clean_filename = f"{date_str}_{DEFAULT_EXTRACT_LABEL}_{suffix}{ext}"
+            suffix += 1
+    # Replaces only the empty placeholder reserved above
+    os.replace(path, clean_path)
+    print(f"Renamed '{os.path.basename(path)}' → '{clean_filename}'")
+    return clean_path, extract_date
+
+
+# --- Load one extract file (XLSX or CSV) ---
+@metrics.timed("extract.load_extract_file")
+def load_extract_file(path, dtype=str, return_path=False):
+    """
+    Normalizes the file name, loads it and adds extract_date.
+    Saves a .parquet version alongside it.
+    Returns the DataFrame, or (DataFrame, renamed path) with return_path=True.
+    """
+    clean_path, extract_date = normalize_extract_path(path)
 
-    df = pd.read_excel(clean_path, dtype=dtype)
+    if clean_path.lower().endswith(".csv"):
+        df = pd.read_csv(clean_path, dtype=dtype)
+    else:
+        df = pd.read_excel(clean_path, dtype=dtype)
     df["extract_date"] = extract_date
+    metrics.add(rows=len(df), bytes=os.path.getsize(clean_path))
 
     if PARQUET_ENABLED:
         import pyarrow as pa
         import pyarrow.parquet as pq
-        parquet_path = clean_path.replace(".xlsx", ".parquet")
+        parquet_path = os.path.splitext(clean_path)[0] + ".parquet"
         table = pa.Table.from_pandas(df, preserve_index=False, safe=False)
         pq.write_table(table, parquet_path)
         print(f"Saved Parquet version: {parquet_path}")
 
-    return df
+    return (df, clean_path) if return_path else df
+
+
+# --- Load the most recent XLSX (your original version) ---
+@metrics.timed("extract.load_latest_xlsx_by_modified_date")
+def load_latest_xlsx_by_modified_date(dtype=str) -> pd.DataFrame:
+    """
+    Loads the most recently modified XLSX file from DATA_DIR.
+    Saves a .parquet version alongside it.
+    """
+    xlsx_files = [
+        os.path.join(DATA_DIR, f)
+        for f in os.listdir(DATA_DIR)
+        if f.endswith(".xlsx") and os.path.isfile(os.path.join(DATA_DIR, f))
+    ]
+    if not xlsx_files:
+        raise FileNotFoundError(f"No .xlsx files found in {DATA_DIR}")
+
+    latest_file = max(xlsx_files, key=os.path.getmtime)
+    return load_extract_file(latest_file, dtype=dtype)
 
 
 # --- NEW: Load and merge all XLSX + Parquet files ---
+@metrics.timed("extract.load_all_extracts")
 def load_all_extracts(dtype=str) -> pd.DataFrame:
     """
     Loads and merges ALL .xlsx and .parquet extracts in DATA_DIR.
@@ -83,6 +122,7 @@ def load_all_extracts(dtype=str) -> pd.DataFrame:
             else:
                 continue
             dfs.append(temp_df)
+            metrics.add(rows=len(temp_df), bytes=os.path.getsize(f))
             print(f"   ✅ {os.path.basename(f)} → {len(temp_df)} rows")
         except Exception as e:
             print(f"❌ Failed to read {f}: {e}")
@@ -1,31 +1,38 @@
 # %%
-import gspread
-from gspread_dataframe import set_with_dataframe
-from oauth2client.service_account import ServiceAccountCredentials
-from etl.loader import run_query
+# Google Sheets export helpers. gspread, oauth2client and gspread_formatting are
+# imported inside the functions that call the Sheets API, so the export
+# post-processing (and the file / memory sinks) load without the Sheets stack.
+from etl.loader import run_query, stream_query
+from etl.sinks import make_tab_name
+from etl import metrics
 import pandas as pd
 import datetime
-import requests
-from bs4 import BeautifulSoup
+import inspect
 import time
-from gspread_formatting import (
-    Borders,
-    Border,
-    CellFormat,
-    format_cell_range,
-    Color,
-    cellFormat,
-    textFormat,
-    numberFormat,
-    BooleanCondition, 
-    DataValidationRule,
-    set_data_validation_for_cell_range
-)
+
+GSHEET_SCOPE = ['https://spreadsheets.google.com/feeds',
+                'https://www.googleapis.com/auth/drive']
+
+
+def get_gsheet_client(creds_path):
+    """
+    Authorizes a gspread client from a service account JSON key file.
+    """
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, GSHEET_SCOPE)
+    return gspread.authorize(creds)
+
+
 
 def add_column_right_border(worksheet, df, col_name, start_row=1, end_row=1000):
     """
     Adds a solid right border to a column titled col_name (by name, not index).
     """
+    import gspread
+    from gspread_formatting import Borders, Border, CellFormat, Color, format_cell_range
+
     try:
         col_idx = df.columns.get_loc(col_name) + 1  # 1-based index
         # The range for the column (A1 notation)
@@ -38,6 +45,7 @@ def add_column_right_border(worksheet, df, col_name, start_row=1, end_row=1000):
             right=Border("SOLID", Color(0, 0, 0))
         )
         fmt = CellFormat(borders=border_style)
+        metrics.count("sheets_api_calls")
         format_cell_range(worksheet, rng, fmt)
     except Exception as e:
         print(f"Could not add border after col {col_name}: {e}")
@@ -47,12 +55,11 @@ def add_column_right_border(worksheet, df, col_name, start_row=1, end_row=1000):
 #     add_column_right_border(worksheet, df_final, col)
 
 def upload_df_to_gsheet(df, tab_name, creds_path, sheet_title, start_cell="A1"):
-    scope = ['https://spreadsheets.google.com/feeds',
-             'https://www.googleapis.com/auth/drive']
+    from gspread_dataframe import set_with_dataframe
 
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-    client = gspread.authorize(creds)
+    client = get_gsheet_client(creds_path)
 
+    metrics.count("sheets_api_calls")
     sheet = client.open(sheet_title)
     worksheet = sheet.worksheet(tab_name)
 
@@ -60,19 +67,28 @@ def upload_df_to_gsheet(df, tab_name, creds_path, sheet_title, start_cell="A1"):
     # worksheet.clear()
 
     # Upload with formulas being parsed correctly
+    metrics.count("sheets_api_calls")
     set_with_dataframe(worksheet, df, row=1, col=1, include_index=False, include_column_header=True, resize=True)
 
 
 # %%
+def zillow_url_slug(row):
+    """
+    Builds the Zillow URL slug (address-city-state-zip) for one row.
+    Also used as the cache key by etl.listing_status.
+    """
+    # Adjust based on your actual column names
+    address = str(row.get("address", "")).strip().replace(" ", "-").replace(".", "")
+    city = str(row.get("city", "Las Vegas")).strip().replace(" ", "-")
+    state = str(row.get("state", "NV")).strip()
+    zip_code = str(row.get("zip", "")).strip()
+    components = [address, city, state, zip_code]
+    return "-".join([c for c in components if c])  # drop empty parts
+
+
 def add_zillow_link_column(df):
     def build_zillow_url(row):
-        # Adjust based on your actual column names
-        address = str(row.get("address", "")).strip().replace(" ", "-").replace(".", "")
-        city = str(row.get("city", "Las Vegas")).strip().replace(" ", "-")
-        state = str(row.get("state", "NV")).strip()
-        zip_code = str(row.get("zip", "")).strip()
-        components = [address, city, state, zip_code]
-        url_slug = "-".join([c for c in components if c])  # drop empty parts
+        url_slug = zillow_url_slug(row)
         return f'=HYPERLINK("https://www.zillow.com/homes/{url_slug}_rb/", "View")'
 
     df = df.copy()  # avoid modifying original df inplace
@@ -87,10 +103,13 @@ def add_zillow_link_column(df):
 def clean_export_dataframe(df):
     df = df.copy()
 
-    # Format currency columns with commas
+    # Format currency columns with commas. Formatted value by value so a chunk
+    # with a NULL formats like one without (see export_and_process_data)
     for col in ['mls_amount', 'price_per_sqft', 'building_sqft']:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64').map("{:,}".format)
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().map(
+                lambda v: f"{int(v):,}" if pd.notna(v) else ""
+            )
 
     # Round score columns if present
     score_cols = ['total_score']
@@ -99,21 +118,55 @@ def clean_export_dataframe(df):
             df[col] = pd.to_numeric(df[col], errors='coerce').round(1)
 
 
-    # Convert date/datetime to string
+    # Convert date/datetime to string, value by value for the same reason
     for col in df.columns:
-        if pd.api.types.is_datetime64_any_dtype(df[col]) or df[col].apply(lambda x: isinstance(x, (datetime.date, pd.Timestamp))).any():
-            df[col] = df[col].astype(str)
+        if pd.api.types.is_datetime64_any_dtype(df[col]) or df[col].dtype == object:
+            df[col] = df[col].map(lambda x: str(x) if isinstance(x, (datetime.date, pd.Timestamp)) else x)
 
     return df
 
-def export_and_process_data(query=None):
-    default_query = """
+
+DEFAULT_EXPORT_QUERY = """
     select
     *
     FROM analytics.analytics_single_prop
     ORDER BY total_score DESC
     """
-    df = run_query(query or default_query)
+
+
+@metrics.timed("gsheet.export_and_process_data")
+def export_and_process_data(query=None, fetch_size=None, use_cache=True):
+    """
+    Streams the export query in chunks (server-side cursor) and runs the
+    post-processing chunk by chunk, so only one raw chunk is in memory at a time.
+    With use_cache, the processed frame is reused until dbt rebuilds the source
+    tables (see etl.export_cache).
+    """
+    query = query or DEFAULT_EXPORT_QUERY
+
+    def build():
+        chunks = [
+            process_export_chunk(chunk)
+            for chunk in stream_query(query, fetch_size=fetch_size)
+        ]
+        return pd.concat(chunks, ignore_index=True)
+
+    if not use_cache:
+        return build()
+
+    from etl.export_cache import cached_export
+    # Editing the post-processing code also invalidates cached frames
+    code_version = "".join(
+        inspect.getsource(fn)
+        for fn in (process_export_chunk, clean_export_dataframe, add_zillow_link_column, zillow_url_slug)
+    )
+    return cached_export(query, build, code_version=code_version)
+
+
+def process_export_chunk(df):
+    """
+    Cleans, formats, adds Zillow links and reorders columns for one chunk of export rows.
+    """
     df_cleaned = clean_export_dataframe(df)
     df_linked = add_zillow_link_column(df_cleaned)
 
@@ -185,18 +238,15 @@ def create_new_tab(sheet_title, creds_path, prefix="Export"):
     Adds basic formatting for headers and account/percent columns.
     Returns the new tab name.
     """
-    scope = ['https://spreadsheets.google.com/feeds',
-             'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-    client = gspread.authorize(creds)
+    client = get_gsheet_client(creds_path)
+    metrics.count("sheets_api_calls")
     sheet = client.open(sheet_title)
 
     # Generate tab name with date and time for uniqueness
-    timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H%M')
-    tab_name = f"{prefix}_{timestamp}"
-    tab_name = tab_name[:99]  # Sheets limit
+    tab_name = make_tab_name(prefix)
 
     # Create the new sheet/tab
+    metrics.count("sheets_api_calls")
     worksheet = sheet.add_worksheet(title=tab_name, rows="1000", cols="20")
 
     # ---- Formatting (after data uploaded) ----
@@ -216,12 +266,14 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
     Apply bold header, currency, percent, and integer formatting to the worksheet.
     Add a right border after each column in border_after_cols.
     """
+    import gspread
     from gspread_formatting import (
         cellFormat, textFormat, numberFormat, Borders, Border, Color,
         DataValidationRule, BooleanCondition, set_data_validation_for_cell_range, format_cell_range
     )
     
     # Bold all column names (header row 1)
+    metrics.count("sheets_api_calls")
     format_cell_range(worksheet, '1:1',
                       cellFormat(textFormat=textFormat(bold=True)))
     
@@ -239,6 +291,7 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
         for col in currency_cols:
             try:
                 rng = col_range(col)
+                metrics.count("sheets_api_calls")
                 format_cell_range(worksheet, rng,
                                   cellFormat(numberFormat=numberFormat(type='NUMBER', pattern='"$"#,##0')))
             except Exception as e:
@@ -249,6 +302,7 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
         for col in percent_cols:
             try:
                 rng = col_range(col)
+                metrics.count("sheets_api_calls")
                 format_cell_range(worksheet, rng,
                                   cellFormat(numberFormat=numberFormat(type='PERCENT', pattern='0%')))
             except Exception as e:
@@ -259,6 +313,7 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
         for col in int_cols:
             try:
                 rng = col_range(col)
+                metrics.count("sheets_api_calls")
                 format_cell_range(worksheet, rng,
                                   cellFormat(numberFormat=numberFormat(type='NUMBER', pattern='#,##0')))
             except Exception as e:
@@ -275,6 +330,7 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
                     right=Border("Double", Color(0, 0, 0), width=2)
                 )
                 fmt = cellFormat(borders=border_style)
+                metrics.count("sheets_api_calls")
                 format_cell_range(worksheet, range_a1, fmt)
             except Exception as e:
                 print(f"Error setting border after col {col}: {e}")
@@ -293,6 +349,7 @@ def format_tab(worksheet, df, currency_cols=None, percent_cols=None, int_cols=No
                     BooleanCondition('BOOLEAN', []),
                     showCustomUi=True
                 )
+                metrics.count("sheets_api_calls")
                 set_data_validation_for_cell_range(worksheet, checkbox_range, rule)
             else:
                 print("No rows to add checkboxes")
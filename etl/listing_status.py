@@ -0,0 +1,206 @@
+# %%
+# listing_status.py
+# Checks whether exported leads are still active, pending or off market
+# by fetching their Zillow pages concurrently.
+#
+# - asyncio with a bounded number of in-flight requests (concurrency)
+# - per-host rate limiting (minimum interval between requests to one host)
+# - on-disk JSON cache keyed by the Zillow URL slug, with a TTL, so repeat
+#   runs only re-check stale entries
+# - base_url is configurable so it can be pointed at a local test server
+import os
+import re
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, quote
+
+import requests
+from bs4 import BeautifulSoup
+
+from config.paths import STATUS_CACHE_PATH, STATUS_CACHE_TTL_HOURS
+
+ZILLOW_BASE_URL = "https://www.zillow.com/homes/"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Checked in order; first match wins
+STATUS_PATTERNS = [
+    ("off_market", re.compile(r"\boff[\s-]?market\b", re.I)),
+    ("sold", re.compile(r"\bsold\b", re.I)),
+    ("pending", re.compile(r"\b(pending|contingent|under contract)\b", re.I)),
+    ("active", re.compile(r"\b(for sale|active)\b", re.I)),
+]
+
+
+def parse_listing_status(html: str) -> str:
+    """
+    Maps a listing page to 'active', 'pending', 'sold', 'off_market' or 'unknown'.
+    Only the status badges are used: the title holds the street address
+    ("12 Sold Ct") and body text mentions nearby sold / pending homes on every
+    page, so neither is a reliable signal.
+    """
+    soup = BeautifulSoup(html or "", "html.parser")
+    candidates = [
+        tag.get_text(" ", strip=True)
+        for tag in soup.select('[data-testid*="status"], [class*="status"]')
+    ]
+
+    for text in candidates:
+        for status, pattern in STATUS_PATTERNS:
+            if pattern.search(text):
+                return status
+    return "unknown"
+
+
+class StatusCache:
+    """
+    JSON file cache: {slug: {"status": ..., "http_status": ..., "checked_at": epoch}}.
+    Entries older than ttl_hours are treated as stale.
+    """
+
+    def __init__(self, path=STATUS_CACHE_PATH, ttl_hours=STATUS_CACHE_TTL_HOURS):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable status cache {path}: {e}")
+
+    def get(self, slug):
+        entry = self.entries.get(slug)
+        if entry and time.time() - entry.get("checked_at", 0) < self.ttl_seconds:
+            return entry
+        return None
+
+    def set(self, slug, status, http_status=None):
+        self.entries[slug] = {
+            "status": status,
+            "http_status": http_status,
+            "checked_at": time.time(),
+        }
+
+    def stale(self, slugs):
+        return [s for s in slugs if self.get(s) is None]
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class HostRateLimiter:
+    """
+    Enforces a minimum interval between request starts to the same host.
+    """
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._locks = {}
+        self._last = {}
+
+    async def wait(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._last.get(host, 0) + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last[host] = time.monotonic()
+
+
+def build_status_url(slug, base_url=ZILLOW_BASE_URL):
+    return f"{base_url.rstrip('/')}/{quote(slug)}_rb/"
+
+
+async def check_listing_statuses(
+    slugs,
+    cache=None,
+    concurrency=8,
+    per_host_interval=1.0,
+    timeout=15,
+    base_url=ZILLOW_BASE_URL,
+    session=None,
+):
+    """
+    Checks the listing status for each slug and returns {slug: status}.
+    Fresh cache entries are returned without a request; stale ones are
+    fetched with at most `concurrency` requests in flight.
+    """
+    cache = cache if cache is not None else StatusCache()
+    session = session or requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(per_host_interval)
+
+    unique_slugs = list(dict.fromkeys(s for s in slugs if s))
+    to_check = cache.stale(unique_slugs)
+    print(f"🔎 Checking {len(to_check)} listing(s) ({len(unique_slugs) - len(to_check)} cached)")
+
+    async def check_one(slug):
+        url = build_status_url(slug, base_url)
+        async with semaphore:
+            await limiter.wait(urlsplit(url).netloc)
+            try:
+                resp = await asyncio.to_thread(session.get, url, timeout=timeout)
+            except requests.RequestException as e:
+                print(f"❌ Status check failed for {slug}: {e}")
+                return
+        if resp.status_code == 404:
+            cache.set(slug, "off_market", resp.status_code)
+        elif resp.ok:
+            cache.set(slug, parse_listing_status(resp.text), resp.status_code)
+        else:
+            # Blocked / throttled responses are not cached so they get retried
+            print(f"⚠️ HTTP {resp.status_code} for {slug}")
+
+    await asyncio.gather(*(check_one(s) for s in to_check))
+    cache.save()
+
+    results = {}
+    for slug in unique_slugs:
+        entry = cache.entries.get(slug)
+        results[slug] = entry["status"] if entry else "unknown"
+    return results
+
+
+async def add_listing_status_column_async(df, cache=None, **kwargs):
+    """
+    Async version of add_listing_status_column() (await it from a running loop).
+    """
+    from etl.gsheet import zillow_url_slug
+
+    df = df.copy()
+    slugs = [zillow_url_slug(row) for _, row in df.iterrows()]
+    statuses = await check_listing_statuses(slugs, cache=cache, **kwargs)
+    df["listing_status"] = [statuses.get(s, "unknown") for s in slugs]
+    return df
+
+
+def add_listing_status_column(df, cache=None, **kwargs):
+    """
+    Adds a 'listing_status' column (active / pending / sold / off_market / unknown)
+    based on each row's Zillow slug. Extra kwargs go to check_listing_statuses().
+    Works from plain scripts and from notebook cells (which already run an event loop).
+    """
+    coro = add_listing_status_column_async(df, cache=cache, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Jupyter: asyncio.run() can't nest, so run the checks on a helper thread's own loop
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
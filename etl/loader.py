@@ -1,14 +1,18 @@
 # %%
 # loader.py
-from sqlalchemy import create_engine, text
 import os
 import pandas as pd
 import psycopg2
 from psycopg2.extras import execute_values
-from io import StringIO
+from io import StringIO, BytesIO
 from dotenv import load_dotenv
 import glob
 import re
+import uuid
+import threading
+from contextlib import contextmanager
+
+from etl import metrics
 
 # Load environment variables from .env
 load_dotenv()
@@ -24,11 +28,36 @@ DB_CONFIG = {
 
 # --- SQLAlchemy Engine ---
 def get_engine():
+    # SQLAlchemy is only needed by run_query / execute_sql; COPY paths use psycopg2
+    from sqlalchemy import create_engine, event
+
     conn_str = (
         f"postgresql+psycopg2://{DB_CONFIG['user']}:{DB_CONFIG['password']}@"
         f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
     )
-    return create_engine(conn_str)
+    engine = create_engine(conn_str)
+    event.listen(engine, "before_cursor_execute", _count_engine_statement)
+    return engine
+
+
+def _count_engine_statement(*args, **kwargs):
+    metrics.count("db_statements")
+
+
+# --- psycopg2 cursor that counts statements for etl.metrics ---
+class CountingCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        metrics.count("db_statements")
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        metrics.count("db_statements")
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        metrics.count("db_statements")
+        return super().copy_expert(sql, file, size)
+
 
 # --- psycopg2 raw connection (for copy_expert) ---
 def get_psycopg2_conn():
@@ -37,17 +66,208 @@ def get_psycopg2_conn():
         user=DB_CONFIG["user"],
         password=DB_CONFIG["password"],
         host=DB_CONFIG["host"],
-        port=DB_CONFIG["port"]
+        port=DB_CONFIG["port"],
+        cursor_factory=CountingCursor,
     )
 
+
+# --- Shared connection pool (concurrent readers, e.g. etl.export_fanout) ---
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+def open_connection_pool(maxconn=4):
+    """
+    Opens a process-wide pool of up to maxconn connections. While it is open,
+    db_connection() borrows from it instead of connecting per call.
+    """
+    global _pool, _pool_slots
+    from psycopg2.pool import ThreadedConnectionPool
+
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        _pool = ThreadedConnectionPool(
+            1,
+            maxconn,
+            dbname=DB_CONFIG["database"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"],
+            cursor_factory=CountingCursor,
+        )
+        # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+        _pool_slots = threading.BoundedSemaphore(maxconn)
+        return _pool
+
+
+def close_connection_pool():
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool, _pool_slots = None, None
+
+
+@contextmanager
+def db_connection():
+    """
+    Yields a pooled connection when open_connection_pool() is active,
+    otherwise a fresh connection that is closed on exit.
+    """
+    pool, slots = _pool, _pool_slots
+    if pool is None:
+        conn = get_psycopg2_conn()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    with slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            # putconn() rolls back any open transaction before reuse
+            pool.putconn(conn)
+
 # --- Read query into DataFrame ---
 def run_query(query: str) -> pd.DataFrame:
-    engine = get_engine()
-    with engine.connect() as conn:
-        return pd.read_sql(query, conn)
+    with metrics.span("loader.run_query") as span:
+        engine = get_engine()
+        with engine.connect() as conn:
+            df = pd.read_sql(query, conn)
+        span.add(rows=len(df))
+        return df
+
+# --- Stream query results in typed chunks (server-side cursor) ---
+# Rows fetched per round-trip; override with STREAM_FETCH_SIZE in .env
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", "10000"))
+
+# Postgres type OIDs -> pandas dtypes for streamed chunks
+PG_TYPE_DTYPES = {
+    16: "boolean",            # bool
+    20: "Int64",              # int8
+    21: "Int64",              # int2
+    23: "Int64",              # int4
+    700: "float64",           # float4
+    701: "float64",           # float8
+    1700: "float64",          # numeric
+    1082: "datetime64[ns]",   # date
+    1114: "datetime64[ns]",   # timestamp
+}
+
+
+def _typed_chunk(rows, description) -> pd.DataFrame:
+    columns = [col.name for col in description]
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    for col in description:
+        dtype = PG_TYPE_DTYPES.get(col.type_code)
+        if dtype is None:
+            continue
+        if dtype.startswith("datetime64"):
+            df[col.name] = pd.to_datetime(df[col.name], errors="coerce")
+        elif dtype == "boolean":
+            df[col.name] = df[col.name].astype("boolean")
+        else:
+            df[col.name] = pd.to_numeric(df[col.name], errors="coerce").astype(dtype)
+    return df
+
+
+def stream_query(query: str, fetch_size: int = None, params=None):
+    """
+    Runs a query through a named (server-side) cursor and yields DataFrames of
+    at most fetch_size rows, typed from the result's Postgres column types.
+    Only one chunk is held client-side at a time. Yields a single empty frame
+    (with columns) if the query returns no rows.
+    """
+    fetch_size = fetch_size or STREAM_FETCH_SIZE
+    with db_connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex[:12]}") as cur:
+            cur.itersize = fetch_size
+            cur.execute(query, params)
+            first = True
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows and not first:
+                    break
+                first = False
+                metrics.add(rows=len(rows))
+                yield _typed_chunk(rows, cur.description)
+                if len(rows) < fetch_size:
+                    break
+        conn.rollback()  # read-only; release the cursor's transaction
+
+
+# --- Bulk read via COPY TO STDOUT into an Arrow table ---
+def _arrow_type(type_code):
+    import pyarrow as pa
+    return {
+        16: pa.bool_(),          # bool
+        20: pa.int64(),          # int8
+        21: pa.int16(),          # int2
+        23: pa.int32(),          # int4
+        700: pa.float32(),       # float4
+        701: pa.float64(),       # float8
+        1700: pa.float64(),      # numeric
+        1082: pa.date32(),       # date
+        1114: pa.timestamp("us"),  # timestamp
+    }.get(type_code, pa.string())
+
+
+@metrics.timed("loader.copy_query_to_arrow")
+def copy_query_to_arrow(query: str):
+    """
+    Reads a query with COPY (query) TO STDOUT (CSV) and parses the stream
+    straight into a pyarrow Table, typed from the query's column types.
+    Much faster than pd.read_sql for large results: no per-value Python objects.
+    """
+    import pyarrow.csv as pacsv
+
+    query = query.strip().rstrip(";")
+    buffer = BytesIO()
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            # Column names and types without fetching any rows
+            cur.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+            description = cur.description
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+        conn.rollback()  # read-only
+
+    metrics.add(bytes=buffer.tell())
+    buffer.seek(0)
+    column_types = {col.name: _arrow_type(col.type_code) for col in description}
+    convert_options = pacsv.ConvertOptions(
+        column_types=column_types,
+        null_values=[""],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,  # "" is an empty string, bare empty is NULL
+        true_values=["t"],
+        false_values=["f"],
+    )
+    table = pacsv.read_csv(buffer, convert_options=convert_options)
+    metrics.add(rows=table.num_rows)
+    return table
+
+
+def arrow_to_pandas(table) -> pd.DataFrame:
+    """
+    Wraps an Arrow table as an Arrow-backed DataFrame (no per-value conversion).
+    """
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def copy_query_to_pandas(query: str) -> pd.DataFrame:
+    return arrow_to_pandas(copy_query_to_arrow(query))
+
 
 # --- Execute raw SQL (DDL or DML) ---
 def execute_sql(sql: str):
+    from sqlalchemy import text
+
     engine = get_engine()
     with engine.begin() as conn:
         conn.execute(text(sql))
@@ -57,6 +277,7 @@ import os
 import glob
 
 
+@metrics.timed("loader.load_dataframe")
 def load_dataframe(
     df: pd.DataFrame = None,
     table_name: str = "",
@@ -65,6 +286,12 @@ def load_dataframe(
     data_dir: str = None,
     load_mode: str = "recent"  # or "all"
 ):
+    """
+    COPYs df (or the files in data_dir) into schema.table_name.
+    Returns the number of rows loaded: 0 when there was nothing to load or the
+    COPY failed (the error is printed and rolled back), so callers should
+    compare it with len(df).
+    """
     import re
     import glob
 
@@ -101,7 +328,7 @@ def load_dataframe(
 
         if not files:
             print("❌ No data files (.csv, .xlsx, .parquet) found in directory.")
-            return
+            return 0
 
         files.sort(key=os.path.getmtime, reverse=True)
         print(f"🗂 Found {len(files)} file(s) in {data_dir}")
@@ -134,13 +361,16 @@ def load_dataframe(
     # --- Exit early if still no data ---
     if df is None or df.empty:
         print("⚠️ No valid data to load.")
-        return
+        return 0
 
     # --- Clean and normalize column names ---
     df = clean_column_names(df)
 
     # --- Replace NaN with None for Postgres ---
-    df = df.where(pd.notnull(df), None)
+    # Only object columns need it; typed (compact) columns are written as blanks by to_csv
+    object_cols = df.select_dtypes(include="object").columns
+    if len(object_cols):
+        df[object_cols] = df[object_cols].where(pd.notnull(df[object_cols]), None)
 
     # --- Load into Postgres ---
     with get_psycopg2_conn() as conn:
@@ -150,6 +380,7 @@ def load_dataframe(
 
             buffer = StringIO()
             df.to_csv(buffer, index=False, header=False, na_rep="")
+            metrics.add(rows=len(df), bytes=buffer.tell())
             buffer.seek(0)
 
             copy_sql = f"""
@@ -160,77 +391,11 @@ def load_dataframe(
                 cur.copy_expert(copy_sql, buffer)
                 conn.commit()
                 print(f"✅ Loaded {len(df)} rows into {schema}.{table_name}")
+                return len(df)
             except Exception as e:
                 conn.rollback()
                 print("❌ Load failed:", e)
-
-    # --- Load files if df not provided ---
-    if df is None and data_dir:
-        file_patterns = ["*.csv", "*.CSV", "*.xlsx", "*.parquet"]
-        files = []
-        for pattern in file_patterns:
-            files.extend(glob.glob(os.path.join(data_dir, pattern)))
-
-        if not files:
-            print("❌ No data files (.csv, .xlsx, .parquet) found in directory.")
-            return
-
-        files.sort(key=os.path.getmtime, reverse=True)
-        print(f"🗂 Found {len(files)} file(s) in {data_dir}")
-
-        if load_mode == "recent":
-            files = [files[0]]
-            print(f"📄 Loading only most recent file: {os.path.basename(files[0])}")
-        else:
-            print(f"📚 Loading ALL {len(files)} files (merged into one DataFrame)")
-
-        dfs = []
-        for f in files:
-            try:
-                if f.endswith((".csv", ".CSV")):
-                    temp_df = pd.read_csv(f)
-                elif f.endswith(".xlsx"):
-                    temp_df = pd.read_excel(f)
-                elif f.endswith(".parquet"):
-                    temp_df = pd.read_parquet(f)
-                else:
-                    continue
-                print(f"   ✅ {os.path.basename(f)} → {len(temp_df)} rows")
-                dfs.append(temp_df)
-            except Exception as e:
-                print(f"❌ Failed to read {f}: {e}")
-
-        df = pd.concat(dfs, ignore_index=True)
-        print(f"📈 Combined DataFrame shape: {df.shape}")
-
-    if df is None or df.empty:
-        print("⚠️ No valid data to load.")
-        return
-
-    df = clean_column_names(df)
-    df = df.where(pd.notnull(df), None)
-
-    with get_psycopg2_conn() as conn:
-        with conn.cursor() as cur:
-            if method == "replace":
-                cur.execute(f"TRUNCATE TABLE {schema}.{table_name};")
-
-            buffer = StringIO()
-            df.to_csv(buffer, index=False, header=False, na_rep="")
-            buffer.seek(0)
-
-            copy_sql = f"""
-                COPY {schema}.{table_name} ({', '.join(df.columns)})
-                FROM STDIN WITH CSV NULL ''
-            """
-            try:
-                cur.copy_expert(copy_sql, buffer)
-                conn.commit()
-                print(f"✅ Loaded {len(df)} rows into {schema}.{table_name}")
-            except Exception as e:
-                conn.rollback()
-                print("❌ Load failed:", e)
-
+                return 0
 
 
 
@@ -251,6 +416,7 @@ def create_export_log_table():
 
 
 
+@metrics.timed("loader.insert_uploaded_to_db")
 def insert_uploaded_to_db(df: pd.DataFrame, table_name="stg__list_history", schema="stg"):
     """
     Insert rows from the dataframe into the 'stg__list_history' table.
@@ -284,10 +450,12 @@ def insert_uploaded_to_db(df: pd.DataFrame, table_name="stg__list_history", sche
         ON CONFLICT (apn) DO NOTHING
     """
 
-    with get_psycopg2_conn() as conn:
+    # Pooled during an export fan-out (see etl.export_fanout)
+    with db_connection() as conn:
         with conn.cursor() as cur:
             execute_values(cur, query, rows)
             conn.commit()
+    metrics.add(rows=len(rows))
     print(f"✅ Inserted {len(rows)} APNs (deduplicated by DB) into {schema}.{table_name}")
 
 
@@ -0,0 +1,199 @@
+# %%
+# metrics.py
+# Lightweight run instrumentation for the ETL modules.
+#
+#   with span("load", rows=len(df)) as s:   # or @timed("load")
+#       ...
+#       s.add(bytes=buffer_size)
+#
+#   count("db_statements")                   # global counters
+#   flush()                                  # -> JSONL file (+ optional Postgres)
+#
+# Every span records wall and CPU time, rows and bytes processed, peak RSS,
+# and how many DB statements / Sheets API calls happened while it was open.
+# CPU time and counters are process-wide, so spans running concurrently on
+# threads see each other's work.
+import os
+import sys
+import json
+import time
+import uuid
+import resource
+import datetime
+import threading
+import functools
+from contextlib import contextmanager
+
+from config.paths import METRICS_PATH, METRICS_TO_POSTGRES
+
+COUNTERS = ("db_statements", "sheets_api_calls")
+
+RUN_ID = os.getenv("ETL_RUN_ID") or datetime.datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+
+_lock = threading.Lock()
+_local = threading.local()
+_counters = {name: 0 for name in COUNTERS}
+_records = []
+
+
+def count(counter, n=1):
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + n
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    def __init__(self, name, parent=None, rows=0, bytes=0):
+        self.name = name
+        self.parent = parent
+        self.rows = rows
+        self.bytes = bytes
+
+    def add(self, rows=0, bytes=0):
+        self.rows += int(rows or 0)
+        self.bytes += int(bytes or 0)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def add(rows=0, bytes=0):
+    """
+    Adds rows / bytes to the innermost open span on this thread (no-op if none).
+    """
+    s = current_span()
+    if s is not None:
+        s.add(rows=rows, bytes=bytes)
+
+
+@contextmanager
+def span(name, rows=0, bytes=0):
+    stack = _stack()
+    s = Span(name, parent=stack[-1].name if stack else None, rows=rows, bytes=bytes)
+    with _lock:
+        counters_before = dict(_counters)
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    status = "ok"
+    stack.append(s)
+    try:
+        yield s
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        stack.pop()
+        with _lock:
+            deltas = {c: _counters.get(c, 0) - counters_before.get(c, 0) for c in COUNTERS}
+            _records.append({
+                "run_id": RUN_ID,
+                "span": s.name,
+                "parent": s.parent,
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "wall_s": round(time.perf_counter() - wall_start, 6),
+                "cpu_s": round(time.process_time() - cpu_start, 6),
+                "rows": s.rows,
+                "bytes": s.bytes,
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                **deltas,
+            })
+
+
+def timed(name=None):
+    """
+    Decorator form of span(); defaults to module.function as the span name.
+    """
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def write_jsonl(path=METRICS_PATH, rows=None):
+    rows = records() if rows is None else rows
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+    print(f"📏 Wrote {len(rows)} metric span(s) to {path}")
+
+
+def write_to_postgres(rows=None, table_name="etl_run_metrics", schema="public"):
+    from psycopg2.extras import execute_values
+    from etl.loader import get_psycopg2_conn
+
+    rows = records() if rows is None else rows
+    if not rows:
+        return
+    columns = [
+        "run_id", "span", "parent", "status", "started_at", "wall_s", "cpu_s",
+        "rows", "bytes", "peak_rss_mb", "db_statements", "sheets_api_calls",
+    ]
+    ddl = f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{table_name} (
+            run_id TEXT NOT NULL,
+            span TEXT NOT NULL,
+            parent TEXT,
+            status TEXT,
+            started_at TIMESTAMPTZ,
+            wall_s DOUBLE PRECISION,
+            cpu_s DOUBLE PRECISION,
+            rows BIGINT,
+            bytes BIGINT,
+            peak_rss_mb DOUBLE PRECISION,
+            db_statements INTEGER,
+            sheets_api_calls INTEGER
+        );
+    """
+    with get_psycopg2_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(ddl)
+            execute_values(
+                cur,
+                f"INSERT INTO {schema}.{table_name} ({', '.join(columns)}) VALUES %s",
+                [tuple(row.get(c) for c in columns) for row in rows],
+            )
+            conn.commit()
+    print(f"📏 Inserted {len(rows)} metric span(s) into {schema}.{table_name}")
+
+
+def flush(path=METRICS_PATH, to_postgres=METRICS_TO_POSTGRES):
+    """
+    Writes all spans recorded so far and clears them.
+    """
+    rows = records()
+    with _lock:
+        _records.clear()
+    write_jsonl(path, rows)
+    if to_postgres:
+        try:
+            write_to_postgres(rows)
+        except Exception as e:
+            print(f"❌ Could not write metrics to Postgres: {e}")
@@ -0,0 +1,310 @@
+# %%
+# pipeline.py
+# Small DAG runner for the ETL pipeline.
+#
+# Each Stage declares:
+#   inputs   -> artifact names produced by upstream stages
+#   outputs  -> artifact names it returns (fn returns {name: value})
+#   sources  -> optional callable returning external files/dirs it depends on
+#
+# A stage's fingerprint is a hash of its input artifacts and source files.
+# If it matches the last successful run (and the outputs are still on disk)
+# the stage is skipped. State is saved after every stage, so a failed run
+# resumes from the last completed stage. Stages whose inputs are all ready
+# run concurrently on a thread pool.
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from config.paths import DATA_DIR, PROJECT_ROOT, PIPELINE_STATE_DIR
+from etl import metrics
+
+
+def _hash_file(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def _is_dataframe(value):
+    # pandas is only imported by stages that need it (fast start for dbt-only runs)
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+def fingerprint_paths(paths) -> str:
+    """
+    Content hash of files (directories are walked in sorted order).
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    digest.update(os.path.relpath(full, path).encode())
+                    _hash_file(full, digest)
+        elif os.path.exists(path):
+            _hash_file(path, digest)
+        else:
+            digest.update(f"missing:{path}".encode())
+    return digest.hexdigest()
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), outputs=(), sources=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.sources = sources
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order, skipping unchanged ones.
+    Artifacts are stored in state_dir (DataFrames as pickle, everything else as JSON).
+    """
+
+    def __init__(self, stages, state_dir=PIPELINE_STATE_DIR, max_workers=4):
+        self.stages = {s.name: s for s in stages}
+        self.state_dir = state_dir
+        self.max_workers = max_workers
+        self.producers = {}
+        for stage in stages:
+            for out in stage.outputs:
+                self.producers[out] = stage.name
+        for stage in stages:
+            missing = [i for i in stage.inputs if i not in self.producers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' has inputs with no producer: {missing}")
+        self.state = self._load_state()
+        self._artifacts = {}
+
+    # --- state + artifacts on disk ---
+    @property
+    def _state_path(self):
+        return os.path.join(self.state_dir, "state.json")
+
+    def _load_state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self._state_path)
+
+    def _artifact_path(self, name):
+        for ext in ("pkl", "json"):
+            path = os.path.join(self.state_dir, "artifacts", f"{name}.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write_artifact(self, name, value):
+        folder = os.path.join(self.state_dir, "artifacts")
+        os.makedirs(folder, exist_ok=True)
+        for ext in ("pkl", "json"):
+            stale = os.path.join(folder, f"{name}.{ext}")
+            if os.path.exists(stale):
+                os.remove(stale)
+        if _is_dataframe(value):
+            path = os.path.join(folder, f"{name}.pkl")
+            value.to_pickle(path)
+        else:
+            path = os.path.join(folder, f"{name}.json")
+            with open(path, "w") as f:
+                json.dump(value, f, default=str)
+        self._artifacts[name] = value
+        return path
+
+    def artifact(self, name):
+        if name not in self._artifacts:
+            path = self._artifact_path(name)
+            if path is None:
+                raise FileNotFoundError(f"Artifact '{name}' has not been produced yet")
+            if path.endswith(".pkl"):
+                import pandas as pd
+                self._artifacts[name] = pd.read_pickle(path)
+            else:
+                with open(path) as f:
+                    self._artifacts[name] = json.load(f)
+        return self._artifacts[name]
+
+    # --- fingerprints ---
+    def _output_fingerprint(self, artifact):
+        producer = self.state.get(self.producers[artifact], {})
+        return producer.get("outputs", {}).get(artifact)
+
+    def stage_fingerprint(self, stage):
+        digest = hashlib.sha256(stage.name.encode())
+        for name in sorted(stage.inputs):
+            digest.update(f"{name}={self._output_fingerprint(name)}".encode())
+        if stage.sources:
+            digest.update(fingerprint_paths(stage.sources()).encode())
+        return digest.hexdigest()
+
+    def is_fresh(self, stage, fingerprint):
+        entry = self.state.get(stage.name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        return all(self._artifact_path(out) for out in stage.outputs)
+
+    # --- execution ---
+    def _run_stage(self, stage, force):
+        fingerprint = self.stage_fingerprint(stage)
+        if not force and self.is_fresh(stage, fingerprint):
+            print(f"⏭  {stage.name}: unchanged, skipped")
+            return stage.name, "skipped"
+
+        print(f"▶️  {stage.name}")
+        started = time.perf_counter()
+        with metrics.span(f"stage.{stage.name}"):
+            inputs = {name: self.artifact(name) for name in stage.inputs}
+            result = stage.fn(inputs) or {}
+        missing = [out for out in stage.outputs if out not in result]
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not return outputs {missing}")
+        # Output fingerprints chain the stage fingerprint, so upstream changes
+        # propagate even when a stage only returns a small marker
+        outputs = {
+            out: hashlib.sha256(
+                (fingerprint + fingerprint_paths([self._write_artifact(out, result[out])])).encode()
+            ).hexdigest()
+            for out in stage.outputs
+        }
+        self.state[stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": outputs,
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"✅ {stage.name} ({self.state[stage.name]['seconds']}s)")
+        return stage.name, "ran"
+
+    def run(self, force=False, only=None):
+        """
+        Runs the pipeline. force=True re-runs every stage; only=[names] limits
+        the run to those stages (their inputs must already exist).
+        Returns {stage: "ran" | "skipped"}. Stage metrics are flushed at the end
+        (see etl.metrics), including for failed runs.
+        """
+        try:
+            return self._run(force, only)
+        finally:
+            metrics.flush()
+
+    def _run(self, force, only):
+        pending = {name for name in self.stages if only is None or name in only}
+        done = {name for name in self.stages if name not in pending}
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending:
+                ready = [
+                    self.stages[name] for name in sorted(pending)
+                    if all(self.producers[i] in done for i in self.stages[name].inputs)
+                ]
+                if not ready:
+                    raise RuntimeError(f"Dependency cycle between stages: {sorted(pending)}")
+
+                futures = [pool.submit(self._run_stage, stage, force) for stage in ready]
+                errors = []
+                for future in futures:
+                    try:
+                        name, status = future.result()
+                        results[name] = status
+                        done.add(name)
+                        pending.discard(name)
+                    except Exception as e:
+                        errors.append(e)
+                # Persist completed stages before surfacing a failure (resume point)
+                self._save_state()
+                if errors:
+                    print("❌ Pipeline failed; re-run to resume after the last completed stage.")
+                    raise errors[0]
+
+        return results
+
+
+# -------------------------------
+# DEFAULT REAL-ESTATE PIPELINE
+# -------------------------------
+def latest_extract_file():
+    files = [
+        os.path.join(DATA_DIR, f)
+        for f in os.listdir(DATA_DIR)
+        if f.endswith(".xlsx") and os.path.isfile(os.path.join(DATA_DIR, f))
+    ]
+    return [max(files, key=os.path.getmtime)] if files else []
+
+
+def dbt_sources():
+    return [
+        os.path.join(PROJECT_ROOT, "models"),
+        os.path.join(PROJECT_ROOT, "macros"),
+        os.path.join(PROJECT_ROOT, "dbt_project.yml"),
+    ]
+
+
+# Column formats applied on the exported tab
+CURRENCY_COLS = ["mls_amount", "price_per_sqft", "est_value", "last_sale_amount", "total_loan_balance", "est_equity_calc", ]
+PERCENT_COLS = ["perc_price_inc", "lot_coverage_ratio"]
+INT_COLS = ["building_sqft", "lot_size_sqft", "diff", "lien_amount", "listed_price_inc"]
+BORDER_AFTER_COLS = ["diff", "lien_amount", "effective_year_built", "total_condition"]
+
+
+def build_default_pipeline(sink=None, state_dir=PIPELINE_STATE_DIR):
+    """
+    extract -> transform -> load -> dbt_build -> export (every strategy, concurrently)
+    """
+    from etl.sinks import get_export_sink
+    sink = sink or get_export_sink()
+
+    def extract(_):
+        from etl.extract import load_latest_xlsx_by_modified_date
+        return {"raw": load_latest_xlsx_by_modified_date()}
+
+    def transform(inputs):
+        from etl.transform import clean_raw_dataframe
+        return {"clean": clean_raw_dataframe(inputs["raw"], compact=True)}
+
+    def load(inputs):
+        from etl.loader import load_dataframe
+        df = inputs["clean"]
+        # Append, same as etl.watcher: stg__property_listings keeps the latest snapshot per property
+        loaded = load_dataframe(df=df, table_name="prop_extract", schema="stg", method="append")
+        # load_dataframe swallows COPY errors; fail here so the stage isn't saved as complete
+        if loaded != len(df):
+            raise RuntimeError(f"Loaded {loaded} of {len(df)} rows into stg.prop_extract")
+        return {"loaded": {"table": "stg.prop_extract", "rows": loaded}}
+
+    def dbt_build(_):
+        subprocess.run(["dbt", "build", "--project-dir", PROJECT_ROOT], cwd=PROJECT_ROOT, check=True)
+        return {"dbt": {"built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}}
+
+    def export(_):
+        # Every strategy (single family + multifamily) concurrently: upload, format
+        # and stg__list_history per strategy (see etl.export_fanout)
+        from etl.export_fanout import export_strategies
+        return {"exports": export_strategies(sink=sink)}
+
+    stages = [
+        Stage("extract", extract, outputs=["raw"], sources=latest_extract_file),
+        Stage("transform", transform, inputs=["raw"], outputs=["clean"]),
+        Stage("load", load, inputs=["clean"], outputs=["loaded"]),
+        Stage("dbt_build", dbt_build, inputs=["loaded"], outputs=["dbt"], sources=dbt_sources),
+        Stage("export", export, inputs=["dbt"], outputs=["exports"]),
+    ]
+    return Pipeline(stages, state_dir=state_dir)
@@ -0,0 +1,273 @@
+# %%
+# sinks.py
+# Export sinks: where the final lead list goes after export_and_process_data().
+#
+#   GSheetSink  -> live Google Sheets (the original gspread path)
+#   FileSink    -> local XLSX / Parquet / CSV files (offline runs, huge lists)
+#   MemorySink  -> in-memory fake that records every API call and payload size
+#
+# Every sink exposes the same three steps used by main.py:
+#   tab_name = sink.create_tab(prefix)
+#   sink.upload(df, tab_name)
+#   sink.format(df, tab_name, currency_cols=..., ...)
+import os
+import time
+import datetime
+import itertools
+import threading
+
+from config.paths import EXPORT_DIR, EXPORT_SINK
+from etl import metrics
+
+# Excel hard limit (header row included)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def make_tab_name(prefix="Export"):
+    """
+    Builds a unique tab name from the prefix and the current date and time.
+    """
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H%M')
+    tab_name = f"{prefix}_{timestamp}"
+    return tab_name[:99]  # Sheets limit
+
+
+def _payload_bytes(df) -> int:
+    """
+    Approximate size of the values sent for a DataFrame upload (CSV-encoded).
+    """
+    if df is None:
+        return 0
+    return len(df.to_csv(index=False).encode("utf-8"))
+
+
+class ExportSink:
+    """
+    Base export sink. Subclasses implement create_tab() and upload();
+    format() is optional (no-op by default).
+    Every call is recorded in self.calls for round-trip counting.
+    Sinks that talk to the Sheets API also bump the sheets_api_calls counter.
+    """
+
+    name = "base"
+    counts_api_calls = True
+
+    def __init__(self):
+        self.calls = []
+
+    def _record(self, method, tab_name=None, df=None, started=None, count_api=True, nbytes=0, **extra):
+        call = {
+            "sink": self.name,
+            "method": method,
+            "tab_name": tab_name,
+            "rows": 0 if df is None else len(df),
+            "cols": 0 if df is None else len(df.columns),
+            "bytes": nbytes,
+            "seconds": 0.0 if started is None else time.perf_counter() - started,
+        }
+        call.update(extra)
+        self.calls.append(call)
+        if count_api and self.counts_api_calls:
+            metrics.count("sheets_api_calls")
+        return call
+
+    @property
+    def api_call_count(self) -> int:
+        return len(self.calls)
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(c["bytes"] for c in self.calls)
+
+    def summary(self) -> dict:
+        by_method = {}
+        for c in self.calls:
+            by_method[c["method"]] = by_method.get(c["method"], 0) + 1
+        return {
+            "sink": self.name,
+            "api_calls": self.api_call_count,
+            "bytes_sent": self.bytes_sent,
+            "seconds": round(sum(c["seconds"] for c in self.calls), 4),
+            "by_method": by_method,
+        }
+
+    def create_tab(self, prefix="Export") -> str:
+        raise NotImplementedError
+
+    def upload(self, df, tab_name):
+        raise NotImplementedError
+
+    def format(self, df, tab_name, currency_cols=None, percent_cols=None,
+               int_cols=None, border_after_cols=None, add_checkboxes=False):
+        pass
+
+
+class GSheetSink(ExportSink):
+    """
+    Google Sheets backend. Authorizes once and reuses the client/spreadsheet
+    for every call instead of re-authorizing per function.
+    Safe to share between threads (see etl.export_fanout).
+    """
+
+    name = "gsheet"
+
+    def __init__(self, creds_path="api_access.json", sheet_title="Lead Generation Tool"):
+        super().__init__()
+        self.creds_path = creds_path
+        self.sheet_title = sheet_title
+        self._sheet = None
+        self._lock = threading.Lock()
+
+    @property
+    def sheet(self):
+        if self._sheet is None:
+            with self._lock:
+                if self._sheet is None:
+                    from etl.gsheet import get_gsheet_client
+                    started = time.perf_counter()
+                    client = get_gsheet_client(self.creds_path)
+                    self._sheet = client.open(self.sheet_title)
+                    self._record("open", started=started)
+        return self._sheet
+
+    def create_tab(self, prefix="Export") -> str:
+        tab_name = make_tab_name(prefix)
+        started = time.perf_counter()
+        self.sheet.add_worksheet(title=tab_name, rows="1000", cols="20")
+        self._record("create_tab", tab_name, started=started)
+        return tab_name
+
+    def upload(self, df, tab_name):
+        from gspread_dataframe import set_with_dataframe
+        started = time.perf_counter()
+        worksheet = self.sheet.worksheet(tab_name)
+        set_with_dataframe(worksheet, df, row=1, col=1, include_index=False,
+                           include_column_header=True, resize=True)
+        self._record("upload", tab_name, df, started=started)
+
+    def format(self, df, tab_name, currency_cols=None, percent_cols=None,
+               int_cols=None, border_after_cols=None, add_checkboxes=False):
+        from etl.gsheet import format_tab
+        started = time.perf_counter()
+        worksheet = self.sheet.worksheet(tab_name)
+        format_tab(
+            worksheet,
+            df,
+            currency_cols=currency_cols,
+            percent_cols=percent_cols,
+            int_cols=int_cols,
+            border_after_cols=border_after_cols,
+            add_checkboxes=add_checkboxes,
+        )
+        # format_tab() counts its own per-range API calls
+        self._record("format", tab_name, started=started, count_api=False)
+
+
+class FileSink(ExportSink):
+    """
+    Local file backend. Each tab becomes one file under output_dir:
+    <tab_name>.xlsx, <tab_name>.parquet or <tab_name>.csv.
+    XLSX exports larger than the Excel row limit are split across sheets.
+    """
+
+    name = "file"
+    counts_api_calls = False
+    FORMATS = ("xlsx", "parquet", "csv")
+
+    def __init__(self, output_dir=EXPORT_DIR, fmt="xlsx"):
+        super().__init__()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported export format '{fmt}'. Use one of {self.FORMATS}.")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.paths = {}
+
+    def create_tab(self, prefix="Export") -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        tab_name = make_tab_name(prefix)
+        self.paths[tab_name] = os.path.join(self.output_dir, f"{tab_name}.{self.fmt}")
+        self._record("create_tab", tab_name)
+        return tab_name
+
+    def upload(self, df, tab_name):
+        path = self.paths.get(tab_name) or os.path.join(self.output_dir, f"{tab_name}.{self.fmt}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        started = time.perf_counter()
+
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False, safe=False)
+            pq.write_table(table, path)
+        elif self.fmt == "csv":
+            df.to_csv(path, index=False)
+        else:
+            import pandas as pd
+            chunk = EXCEL_MAX_ROWS - 1
+            with pd.ExcelWriter(path) as writer:
+                if len(df) <= chunk:
+                    df.to_excel(writer, sheet_name="leads", index=False)
+                else:
+                    for i, start in enumerate(range(0, len(df), chunk), start=1):
+                        df.iloc[start:start + chunk].to_excel(writer, sheet_name=f"leads_{i}", index=False)
+
+        self.paths[tab_name] = path
+        self._record("upload", tab_name, df, started=started, nbytes=os.path.getsize(path), path=path)
+        print(f"✅ Wrote {len(df)} rows to {path}")
+
+
+class MemorySink(ExportSink):
+    """
+    In-memory fake for profiling and CI. Keeps uploaded frames in self.tabs
+    and records one call per Sheets API round-trip the gspread backend
+    would have made (including one per formatted range).
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self.tabs = {}
+        self._ids = itertools.count(1)  # thread-safe tab numbering
+
+    def create_tab(self, prefix="Export") -> str:
+        tab_name = f"{make_tab_name(prefix)}_{next(self._ids)}"[:99]
+        self.tabs[tab_name] = None
+        self._record("create_tab", tab_name)
+        return tab_name
+
+    def upload(self, df, tab_name):
+        self.tabs[tab_name] = df.copy()
+        # Only the fake pays for encoding the payload to measure it
+        self._record("upload", tab_name, df, nbytes=_payload_bytes(df))
+
+    def format(self, df, tab_name, currency_cols=None, percent_cols=None,
+               int_cols=None, border_after_cols=None, add_checkboxes=False):
+        # format_tab(): 1 header call + 1 call per column range (+1 for checkboxes)
+        self._record("format", tab_name, range="header")
+        for kind, cols in (
+            ("currency", currency_cols),
+            ("percent", percent_cols),
+            ("int", int_cols),
+            ("border", border_after_cols),
+        ):
+            for col in cols or []:
+                if col in df.columns:
+                    self._record("format", tab_name, range=f"{kind}:{col}")
+        if add_checkboxes and len(df) > 0:
+            self._record("format", tab_name, range="checkboxes")
+
+
+def get_export_sink(kind=None, **kwargs) -> ExportSink:
+    """
+    Returns an export sink by name: "gsheet", "file" or "memory".
+    Defaults to the EXPORT_SINK environment variable (gsheet if unset).
+    """
+    kind = (kind or EXPORT_SINK).lower()
+    if kind == "gsheet":
+        return GSheetSink(**kwargs)
+    if kind == "file":
+        return FileSink(**kwargs)
+    if kind == "memory":
+        return MemorySink(**kwargs)
+    raise ValueError(f"Unknown export sink '{kind}'. Use 'gsheet', 'file' or 'memory'.")
@@ -0,0 +1,254 @@
+# %%
+# watcher.py
+# Long-running watch-folder ingest for DATA_DIR.
+#
+#   python -m etl.watcher                    # watch DATA_DIR until Ctrl+C
+#   python -m etl.watcher --once             # ingest whatever is there and exit
+#
+# Polls DATA_DIR with os.scandir (works the same on macOS and Linux) and
+# tracks each file's size + mtime. A file is queued once it has stopped
+# changing for `settle_seconds` (debounces partial writes / downloads).
+# Queued files are ingested by a bounded thread pool:
+#   load_extract_file -> clean_raw_dataframe(compact=True) -> load_dataframe(append)
+# Content fingerprints of ingested files are kept in a state file, so renames,
+# restarts and duplicate drops never load the same extract twice. A fingerprint
+# is claimed before its ingest starts, so the renamed copy that appears while
+# the first ingest is still running is skipped too.
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.paths import DATA_DIR, WATCHER_STATE_PATH
+from etl import metrics
+
+WATCH_EXTENSIONS = (".xlsx", ".csv")
+# Browser / Excel temp files that are never complete extracts
+IGNORED_PREFIXES = ("~$", ".")
+IGNORED_SUFFIXES = (".crdownload", ".part", ".tmp", ".download")
+
+
+class WatchState:
+    """
+    {fingerprint: {"file": ..., "rows": ..., "loaded_at": ...}} persisted as JSON.
+    """
+
+    def __init__(self, path=WATCHER_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.ingested = {}
+        self.in_flight = set()
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.ingested = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable watcher state {path}: {e}")
+
+    def seen(self, fingerprint):
+        with self._lock:
+            return fingerprint in self.ingested
+
+    def claim(self, fingerprint):
+        """
+        Reserves a fingerprint for ingest. False if it was already ingested
+        or another worker is ingesting it right now.
+        """
+        with self._lock:
+            if fingerprint in self.ingested or fingerprint in self.in_flight:
+                return False
+            self.in_flight.add(fingerprint)
+            return True
+
+    def release(self, fingerprint):
+        """
+        Drops a claim without marking it ingested (failed ingest).
+        """
+        with self._lock:
+            self.in_flight.discard(fingerprint)
+
+    def mark(self, fingerprint, **info):
+        with self._lock:
+            self.in_flight.discard(fingerprint)
+            self.ingested[fingerprint] = {**info, "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.ingested, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def is_candidate(name):
+    lower = name.lower()
+    return (
+        lower.endswith(WATCH_EXTENSIONS)
+        and not name.startswith(IGNORED_PREFIXES)
+        and not lower.endswith(IGNORED_SUFFIXES)
+    )
+
+
+def scan(folder):
+    """
+    {path: (size, mtime)} for candidate files in folder.
+    """
+    found = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and is_candidate(entry.name):
+                st = entry.stat()
+                found[entry.path] = (st.st_size, st.st_mtime)
+    return found
+
+
+def ingest_file(path, table_name="prop_extract", schema="stg", method="append"):
+    """
+    Loads one extract file into schema.table_name.
+    Returns (row count, path after load_extract_file's rename). Raises if the
+    load fails, so the file is not marked as ingested and is retried.
+    """
+    from etl.extract import load_extract_file
+    from etl.transform import clean_raw_dataframe
+    from etl.loader import load_dataframe
+
+    with metrics.span("watcher.ingest_file"):
+        df, clean_path = load_extract_file(path, return_path=True)
+        df_clean = clean_raw_dataframe(df, compact=True)
+        loaded = load_dataframe(df=df_clean, table_name=table_name, schema=schema, method=method)
+        if loaded != len(df_clean):
+            raise RuntimeError(f"Loaded {loaded} of {len(df_clean)} rows from {clean_path} into {schema}.{table_name}")
+        return len(df_clean), clean_path
+
+
+class FolderWatcher:
+    def __init__(self, folder=DATA_DIR, poll_interval=2.0, settle_seconds=3.0,
+                 max_workers=2, state=None, ingest=ingest_file):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.max_workers = max_workers
+        self.state = state or WatchState()
+        self.ingest = ingest
+        self.queue = queue.Queue()
+        self._pending = {}     # path -> ((size, mtime), first_seen_unchanged)
+        self._queued = set()   # paths queued or being ingested
+        self._handled = {}     # path -> (size, mtime) already ingested or skipped
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def poll(self):
+        """
+        One scan: queue files whose size + mtime haven't changed for settle_seconds.
+        """
+        now = time.monotonic()
+        current = scan(self.folder)
+        for path, signature in current.items():
+            with self._lock:
+                if path in self._queued or self._handled.get(path) == signature:
+                    continue
+            previous = self._pending.get(path)
+            if previous is None or previous[0] != signature:
+                self._pending[path] = (signature, now)
+            elif now - previous[1] >= self.settle_seconds:
+                del self._pending[path]
+                with self._lock:
+                    self._queued.add(path)
+                self.queue.put((path, signature))
+        for path in list(self._pending):
+            if path not in current:
+                del self._pending[path]
+
+    def _process(self, path, signature):
+        from etl.pipeline import fingerprint_paths
+
+        try:
+            if not os.path.exists(path):
+                return
+            fingerprint = fingerprint_paths([path])
+            with self._lock:
+                self._handled[path] = signature
+            if not self.state.claim(fingerprint):
+                return
+            started = time.perf_counter()
+            print(f"📥 Ingesting {os.path.basename(path)}")
+            try:
+                rows, clean_path = self.ingest(path)
+            except Exception:
+                self.state.release(fingerprint)
+                with self._lock:
+                    self._handled.pop(path, None)  # retried on a later scan
+                raise
+            # The ingest renames the file; remember the new path so it isn't queued again
+            if clean_path != path and os.path.exists(clean_path):
+                st = os.stat(clean_path)
+                with self._lock:
+                    self._handled[clean_path] = (st.st_size, st.st_mtime)
+            self.state.mark(fingerprint, file=os.path.basename(clean_path), rows=rows)
+            print(f"✅ {os.path.basename(clean_path)} queryable in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"❌ Ingest failed for {path}: {e}")
+        finally:
+            with self._lock:
+                self._queued.discard(path)
+            metrics.flush()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                path, signature = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process(path, signature)
+            finally:
+                self.queue.task_done()
+
+    def run(self, once=False):
+        """
+        Polls until stopped (Ctrl+C). once=True drains the current files and returns.
+        """
+        print(f"👀 Watching {self.folder} (every {self.poll_interval}s, {self.max_workers} worker(s))")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for _ in range(self.max_workers):
+                pool.submit(self._worker)
+            try:
+                if once:
+                    # Two polls settle_seconds apart make every stable file eligible
+                    self.poll()
+                    time.sleep(self.settle_seconds)
+                    self.poll()
+                    self.queue.join()
+                else:
+                    while not self._stop.is_set():
+                        self.poll()
+                        self._stop.wait(self.poll_interval)
+            except KeyboardInterrupt:
+                print("🛑 Stopping watcher")
+            finally:
+                self._stop.set()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch DATA_DIR and ingest new Propstream extracts")
+    parser.add_argument("--folder", default=DATA_DIR)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--settle-seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    FolderWatcher(
+        folder=args.folder,
+        poll_interval=args.poll_interval,
+        settle_seconds=args.settle_seconds,
+        max_workers=args.workers,
+    ).run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,104 +1,195 @@
 # main.py
 
 # -------------------------------
-# IMPORTS
+# MAIN ETL PIPELINE / CLI
 # -------------------------------
-# ETL extract/transform/load functions from your project modules
-from etl.extract import load_latest_xlsx_by_modified_date
-from etl.transform import clean_raw_dataframe
-from etl.loader import load_dataframe
-from etl.gsheet import upload_df_to_gsheet, add_zillow_link_column, export_and_process_data, clean_export_dataframe
-from etl.loader import run_query
-from etl.gsheet import create_new_tab
-from etl.gsheet import format_tab
-from etl.gsheet import add_checkbox_column
-from etl.loader import insert_uploaded_to_db
+#   python main.py                      # full pipeline (same as `python main.py run`)
+#   python main.py run --force          # re-run every stage
+#   python main.py extract              # read the latest extract (renames + Parquet copy)
+#   python main.py load [--file PATH]   # extract -> clean -> COPY into stg.prop_extract
+#   python main.py dbt [--select ...]   # dbt build
+#   python main.py export [--only multi_family] [--sink file]
+#   python main.py profile stg.stg__property_listings
+#   python main.py underwrite [--load]
+#   python main.py watch [--once]
+#
+# Each command imports only what it needs (pandas, SQLAlchemy, psycopg2, the
+# gspread stack, ...) inside its handler, so partial runs from cron start fast.
+# Startup budget (handler imports included): python -m benchmarks.bench_startup
+# (CLI_STARTUP_BUDGET_MS). Update its HANDLER_IMPORTS when a handler changes.
+#
+# The full pipeline is a small DAG of stages (see etl/pipeline.py):
+#
+#   extract -> transform -> load -> dbt_build -> export
+#
+# 1. EXTRACT:   load the latest raw XLSX from DATA_DIR.
+# 2. TRANSFORM: clean and standardize the raw data (clean_raw_dataframe).
+# 3. LOAD:      COPY (append) the cleaned frame into stg.prop_extract.
+# 4. DBT:       `dbt build` the staging / intermediate / analytics models.
+# 5. EXPORT:    for every strategy (single family, multifamily) concurrently:
+#               run its query, add Zillow links + checkboxes, upload to a new tab
+#               through the export sink (EXPORT_SINK=gsheet|file|memory), apply
+#               formatting and insert the exported APNs into stg.stg__list_history.
+#
+# Each stage is skipped when its inputs
+# haven't changed since the last successful run, and a failed run resumes from
+# the last completed stage. Use --force to re-run everything.
+import sys
+import argparse
+
+COMMANDS = ("run", "extract", "load", "dbt", "export", "profile", "underwrite", "watch")
+
+
+def cmd_run(args):
+    from etl.pipeline import build_default_pipeline
+
+    pipeline = build_default_pipeline()
+    results = pipeline.run(force=args.force, only=args.only)
+    print(f"🏁 Pipeline finished: {results}")
+
+
+def cmd_extract(args):
+    from etl.extract import load_extract_file, load_latest_xlsx_by_modified_date
+
+    df = load_extract_file(args.file) if args.file else load_latest_xlsx_by_modified_date()
+    print(f"📄 Extract: {df.shape[0]} rows x {df.shape[1]} columns")
+
+
+def cmd_load(args):
+    from etl.watcher import ingest_file
+    from etl.pipeline import latest_extract_file
+    from etl import metrics
+
+    path = args.file or next(iter(latest_extract_file()), None)
+    if path is None:
+        print("❌ No extract found to load.")
+        sys.exit(1)
+    rows, path = ingest_file(path, table_name=args.table, schema=args.schema, method=args.method)
+    metrics.flush()
+    print(f"✅ Loaded {rows} rows from {path} into {args.schema}.{args.table}")
+
+
+def cmd_dbt(args):
+    import subprocess
+    from config.paths import PROJECT_ROOT
+
+    command = ["dbt", "build", "--project-dir", PROJECT_ROOT]
+    if args.select:
+        command += ["--select", *args.select]
+    sys.exit(subprocess.run(command, cwd=PROJECT_ROOT).returncode)
+
+
+def cmd_export(args):
+    from etl.export_fanout import default_strategies, export_strategies
+    from etl.sinks import get_export_sink
+
+    strategies = default_strategies()
+    if args.only:
+        unknown = set(args.only) - {s.name for s in strategies}
+        if unknown:
+            print(f"❌ Unknown strategies: {', '.join(sorted(unknown))}")
+            sys.exit(2)
+        strategies = [s for s in strategies if s.name in args.only]
+    export_strategies(
+        strategies,
+        sink=get_export_sink(args.sink),
+        max_workers=args.workers,
+        use_cache=not args.no_cache,
+        record_history=not args.no_history,
+    )
+
+
+def cmd_profile(args):
+    from analytics.profiler import profile_table, print_profile
+
+    profile = profile_table(args.table, columns=args.columns, top_k=args.top_k, analyze=args.analyze)
+    print_profile(profile)
+
+
+def cmd_underwrite(args):
+    from analytics.underwriting import load_candidates, scenario_grid, underwrite, to_frame, load_underwriting
+
+    props = load_candidates()
+    scenarios = scenario_grid(rehab_per_sqft=args.rehab_per_sqft, interest_rate=args.interest_rate)
+    results = underwrite(props, scenarios)
+    print(f"🧮 Underwrote {len(props):,} leads x {len(scenarios)} scenarios")
+    if args.load:
+        load_underwriting(to_frame(results, props, scenarios), scenarios)
+
+
+def cmd_watch(args):
+    from etl.watcher import FolderWatcher
+    from config.paths import DATA_DIR
+
+    FolderWatcher(
+        folder=args.folder or DATA_DIR,
+        settle_seconds=args.settle_seconds,
+        max_workers=args.workers,
+    ).run(once=args.once)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Real-estate ETL pipeline")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+
+    p = sub.add_parser("run", help="run the full pipeline (default)")
+    p.add_argument("--force", action="store_true", help="re-run every stage, ignoring fingerprints")
+    p.add_argument("--only", nargs="+", help="run only these stages (e.g. --only dbt_build export)")
+    p.set_defaults(handler=cmd_run)
 
-
-
-
-
-# Google Sheets API libraries for uploading final data
-import gspread
-from gspread_dataframe import set_with_dataframe
-from oauth2client.service_account import ServiceAccountCredentials
-
-# -------------------------------
-# MAIN ETL PIPELINE
-# -------------------------------
-
-# 1. EXTRACT:
-# Load the latest raw data file (xlsx) based on modified date.
-# This extracts your most recent data snapshot into a DataFrame.
-df = load_latest_xlsx_by_modified_date()
-
-# 2. TRANSFORM:
-# Apply cleaning and standardization logic to raw data.
-# This can include formatting, deduplication, handling missing data, etc.
-df_clean = clean_raw_dataframe(df)
-
-# 3. LOAD:
-# Load the cleaned dataframe into your database or staging table.
-# This prepares it for downstream SQL transformations and BI usage.
-load_dataframe(
-    df=df_clean,
-    table_name="prop_extract",
-    schema="stg",
-    data_dir="/Users/borismartinez/Documents/real-estate/data",
-    load_mode="recent"
-)
-
-# 4. DBT:
-# (Not shown in code here) 
-# Use dbt models to build transformations:
-#  - src: sources
-#  - int: intermediate cleaning and joining
-#  - analytics: final datasets optimized for reporting
-# This ensures modular, tested, and version controlled SQL transformations. 
-
-# 5. EXPORT TO GOOGLE SHEETS:
-# Upload the cleaned dataframe to a Google Sheet tab for end-users.
-# This step applies any final presentation logic (like formatted columns or
-# adding hyperlinks) in Python before pushing.
-creds_path = "api_access.json"        # Service account credentials JSON
-sheet_title = "Lead Generation Tool"  # Exact Google Sheet name
-tab_name = "Single Family Leads_1"    # Target worksheet/tab name
-
-tab_name = create_new_tab(sheet_title, creds_path)
-
-# This runs the export query on the final dbt table and applies all formatting + Zillow Link
-df_final = export_and_process_data()
-df_final = add_checkbox_column(df_final)
-
-upload_df_to_gsheet(df_final, tab_name, creds_path, sheet_title)
-
-
-# 4. Get the worksheet object
-scope = ['https://spreadsheets.google.com/feeds',
-         'https://www.googleapis.com/auth/drive']
-creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-client = gspread.authorize(creds)
-sheet = client.open(sheet_title)
-worksheet = sheet.worksheet(tab_name)
-
-# 5. Apply formatting
-currency_cols = ["mls_amount", "price_per_sqft", "est_value", "last_sale_amount", "total_loan_balance", "est_equity_calc", ]
-percent_cols = ["perc_price_inc", "lot_coverage_ratio"]
-int_cols = ["building_sqft", "lot_size_sqft", "diff", "lien_amount", "listed_price_inc" ]
-
-border_after_cols = ["diff", "lien_amount", "effective_year_built", "total_condition"]
-
-format_tab(
-    worksheet,
-    df_final,
-    currency_cols = currency_cols,
-    int_cols = int_cols,
-    border_after_cols = border_after_cols,
-    add_checkboxes=True    # <-- here!
-)
-print(f"✅ Uploaded and formatted on new tab: {tab_name}")
-
-# After uploading to Google Sheets and formatting:
-insert_uploaded_to_db(df_final)
-
-print("insert_uploaded_to_db() rows into db")
\ No newline at end of file
+    p = sub.add_parser("extract", help="read the latest (or a given) extract file")
+    p.add_argument("--file", help="extract file to read instead of the newest in DATA_DIR")
+    p.set_defaults(handler=cmd_extract)
+
+    p = sub.add_parser("load", help="clean an extract and COPY it into Postgres")
+    p.add_argument("--file", help="extract file to load instead of the newest in DATA_DIR")
+    p.add_argument("--schema", default="stg")
+    p.add_argument("--table", default="prop_extract")
+    p.add_argument("--method", choices=["append", "replace"], default="append")
+    p.set_defaults(handler=cmd_load)
+
+    p = sub.add_parser("dbt", help="dbt build the models")
+    p.add_argument("--select", nargs="+", help="dbt node selection")
+    p.set_defaults(handler=cmd_dbt)
+
+    p = sub.add_parser("export", help="export every strategy to its own tab")
+    p.add_argument("--only", nargs="+", help="strategy names to export")
+    p.add_argument("--sink", choices=["gsheet", "file", "memory"], default=None)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--no-cache", action="store_true")
+    p.add_argument("--no-history", action="store_true", help="don't record exported APNs in stg__list_history")
+    p.set_defaults(handler=cmd_export)
+
+    p = sub.add_parser("profile", help="profile a table inside Postgres")
+    p.add_argument("table", help="schema.table")
+    p.add_argument("--columns", nargs="+")
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--analyze", action="store_true", help="refresh planner statistics first")
+    p.set_defaults(handler=cmd_profile)
+
+    p = sub.add_parser("underwrite", help="rehab / ARV / MAO / cash flow for every lead")
+    p.add_argument("--rehab-per-sqft", type=float, nargs="+", default=[25, 35, 50])
+    p.add_argument("--interest-rate", type=float, nargs="+", default=[0.065, 0.07, 0.075])
+    p.add_argument("--load", action="store_true", help="load results into stg.underwriting")
+    p.set_defaults(handler=cmd_underwrite)
+
+    p = sub.add_parser("watch", help="watch DATA_DIR and ingest new extracts")
+    p.add_argument("--folder")
+    p.add_argument("--settle-seconds", type=float, default=3.0)
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--once", action="store_true")
+    p.set_defaults(handler=cmd_watch)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # `python main.py` / `python main.py --force` keep running the full pipeline
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["run", *argv]
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 {{ config(materialized='table') }}
 
 WITH base AS (
-    SELECT *
-    from {{ ref('stg__property_listings') }}
+    SELECT
+        l.*,
+        -- Market comps for the same zip / property type (180-day window)
+        c.median_price_per_sqft AS zip_median_price_per_sqft,
+        c.median_days_on_market AS zip_median_days_on_market,
+        l.price_per_sqft / NULLIF(c.median_price_per_sqft, 0) AS price_per_sqft_vs_zip
+    from {{ ref('stg__property_listings') }} l
+    left join {{ ref('int__zip_comps') }} c
+        on c.zip = l.zip
+        and c.property_type = l.property_type
+        and c.window_days = 180
+    -- Leads come from the newest extract only: a property missing from it is no
+    -- longer listed. Older snapshots are kept for comps (int__zip_comps).
+    where l.extract_date = (select max(extract_date) from {{ ref('stg__property_listings') }})
 ),
 
 -- -- GENERAL SCORE (0–100)
@@ -56,7 +68,16 @@ base_w_scores AS (
     -- HOA Penalty (Max -20)
     CASE WHEN has_hoa THEN -20 ELSE 0 END AS hoa_penalty,
 
-    -- Total Score (Max theoretical total ~ 85)
+    -- Relative Value vs zip comps (Max 15)
+    CASE
+        WHEN price_per_sqft_vs_zip IS NULL THEN 0
+        WHEN price_per_sqft_vs_zip <= 0.80 THEN 15
+        WHEN price_per_sqft_vs_zip <= 0.90 THEN 10
+        WHEN price_per_sqft_vs_zip <= 1.00 THEN 5
+        ELSE 0
+    END AS relative_value_score,
+
+    -- Total Score (Max theoretical total ~ 100)
     (
         -- Reusing the same logic for price score
         CASE 
@@ -89,6 +110,14 @@ base_w_scores AS (
         CASE WHEN long_held_flag THEN 5 ELSE 0 END
         +
         CASE WHEN has_hoa THEN -20 ELSE 0 END
+        +
+        CASE
+            WHEN price_per_sqft_vs_zip IS NULL THEN 0
+            WHEN price_per_sqft_vs_zip <= 0.80 THEN 15
+            WHEN price_per_sqft_vs_zip <= 0.90 THEN 10
+            WHEN price_per_sqft_vs_zip <= 1.00 THEN 5
+            ELSE 0
+        END
     ) AS total_score
 
     FROM base
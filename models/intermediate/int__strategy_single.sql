@@ -1,8 +1,20 @@
 {{ config(materialized='table') }}
 
 WITH base AS (
-    SELECT *
-    from {{ ref('stg__property_listings') }}
+    SELECT
+        l.*,
+        -- Market comps for the same zip / property type (180-day window)
+        c.median_price_per_sqft AS zip_median_price_per_sqft,
+        c.median_days_on_market AS zip_median_days_on_market,
+        l.price_per_sqft / NULLIF(c.median_price_per_sqft, 0) AS price_per_sqft_vs_zip
+    from {{ ref('stg__property_listings') }} l
+    left join {{ ref('int__zip_comps') }} c
+        on c.zip = l.zip
+        and c.property_type = l.property_type
+        and c.window_days = 180
+    -- Leads come from the newest extract only: a property missing from it is no
+    -- longer listed. Older snapshots are kept for comps (int__zip_comps).
+    where l.extract_date = (select max(extract_date) from {{ ref('stg__property_listings') }})
 ),
 
 -- -- GENERAL SCORE (0–100)
@@ -83,6 +95,15 @@ base_with_scores AS (
         ELSE 0
         END AS mls_fresh_bonus,
 
+        -- Relative Value vs zip comps (listing $/sqft vs the zip's 180-day median)
+        CASE
+            WHEN price_per_sqft_vs_zip IS NULL THEN 0
+            WHEN price_per_sqft_vs_zip <= 0.80 THEN 20
+            WHEN price_per_sqft_vs_zip <= 0.90 THEN 10
+            WHEN price_per_sqft_vs_zip <= 1.00 THEN 5
+            ELSE 0
+        END AS relative_value_score,
+
         -- Bonuses and Penalties
         CASE WHEN under_assessed_flag THEN 10 ELSE 0 END AS under_assessed_bonus,
         CASE WHEN low_improvement_value_flag THEN 10 ELSE 0 END AS low_improvement_bonus,
@@ -104,6 +125,7 @@ scored_listings AS (
             price_score +
             equity_score +
             mls_days_score +
+            relative_value_score +
             hoa_penalty
 
         ) AS total_score
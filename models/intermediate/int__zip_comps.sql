@@ -0,0 +1,54 @@
+{{ config(
+    materialized='incremental',
+    incremental_strategy='delete+insert',
+    unique_key='zip',
+    indexes=[
+        {'columns': ['zip', 'property_type', 'window_days']},
+        {'columns': ['zip']}
+    ]
+) }}
+
+-- Market comps per zip / property type over rolling MLS windows (90 / 180 / 365 days).
+-- Median $/sqft, days on market and list price, for relative-value scoring in the strategy models.
+-- Incremental runs only recompute zips that appear in the newest extract
+-- (delete+insert on zip); run `dbt build --full-refresh -s int__zip_comps`
+-- periodically so windows for untouched zips roll forward too.
+
+with listings as (
+    select *
+    from {{ ref('stg__property_listings') }}
+    where zip is not null
+      and mls_date is not null
+    {% if is_incremental() %}
+      and zip in (
+          select distinct zip
+          from {{ ref('stg__property_listings') }}
+          where extract_date = (select max(extract_date) from {{ ref('stg__property_listings') }})
+      )
+    {% endif %}
+),
+
+-- Each extract repeats active listings; keep the latest snapshot per property
+latest_per_property as (
+    select distinct on (apn, address) *
+    from listings
+    order by apn, address, extract_date desc
+),
+
+windows as (
+    select unnest(array[90, 180, 365]) as window_days
+)
+
+select
+    l.zip,
+    l.property_type,
+    w.window_days,
+    count(*) as listing_count,
+    percentile_cont(0.5) within group (order by l.price_per_sqft) as median_price_per_sqft,
+    percentile_cont(0.5) within group (order by l.mls_days_on_market) as median_days_on_market,
+    percentile_cont(0.5) within group (order by l.mls_amount) as median_mls_amount,
+    current_date as as_of_date
+from latest_per_property l
+cross join windows w
+where l.mls_date >= current_date - w.window_days
+group by l.zip, l.property_type, w.window_days
@@ -151,8 +151,11 @@ deduped as (
 )
 
 
-select * 
-from flags
+-- stg.prop_extract is append-only (one snapshot per extract); keep the latest per property.
+-- A property can't be active if it's missing from the newest extract, so the strategy
+-- models filter to extract_date = max(extract_date); int__zip_comps uses the full history.
+select *
+from deduped
 
 
 
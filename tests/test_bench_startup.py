@@ -0,0 +1,37 @@
+# CLI startup benchmark: HANDLER_IMPORTS follows main.py, and the Sheets stack stays out.
+import ast
+import os
+
+from benchmarks.bench_startup import HANDLER_IMPORTS, sheets_imports
+from config.paths import PROJECT_ROOT
+from main import COMMANDS
+
+
+def handler_imports():
+    with open(os.path.join(PROJECT_ROOT, "main.py")) as f:
+        tree = ast.parse(f.read())
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("cmd_"):
+            modules = set()
+            for stmt in ast.walk(node):
+                if isinstance(stmt, ast.ImportFrom):
+                    # `from etl import metrics` imports etl.metrics
+                    modules |= {f"{stmt.module}.{a.name}" if stmt.module == "etl" else stmt.module
+                                for a in stmt.names}
+                elif isinstance(stmt, ast.Import):
+                    modules |= {a.name for a in stmt.names}
+            imports[node.name[len("cmd_"):]] = modules
+    return imports
+
+
+def test_handler_imports_cover_every_command():
+    direct = handler_imports()
+    assert set(HANDLER_IMPORTS) == set(COMMANDS) == set(direct)
+    for command, modules in direct.items():
+        assert modules <= set(HANDLER_IMPORTS[command]), command
+
+
+def test_load_and_dbt_do_not_load_the_sheets_stack():
+    assert sheets_imports("load") == []
+    assert sheets_imports("dbt") == []
@@ -0,0 +1,65 @@
+# Export cache keys and freshness, with table_stats() stubbed (no Postgres needed).
+import os
+import threading
+
+import pandas as pd
+
+from etl import export_cache
+from etl.export_cache import ExportCache, cached_export, tables_in_query
+
+
+def test_tables_in_query_includes_unqualified_names():
+    query = "select * from prop_extract p join stg.stg__list_history h on p.apn = h.apn"
+    assert tables_in_query(query) == ["prop_extract", "stg.stg__list_history"]
+
+
+def test_stale_stats_invalidate_and_unresolved_tables_bypass(tmp_path, monkeypatch):
+    cache = ExportCache(cache_dir=str(tmp_path))
+    stats = {"prop_extract": [1, 10, 0, 0]}
+    monkeypatch.setattr(export_cache, "table_stats", lambda tables: {t: stats.get(t) for t in tables})
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.DataFrame({"apn": ["a", "b"]})
+
+    cached_export("select * from prop_extract", build, cache=cache)
+    cached_export("select * from prop_extract", build, cache=cache)
+    assert len(builds) == 1
+
+    # Direct DML on the unqualified table changes its counters
+    stats["prop_extract"] = [1, 11, 0, 0]
+    cached_export("select * from prop_extract", build, cache=cache)
+    assert len(builds) == 2
+
+    # Nothing resolves (e.g. only a CTE): never served from cache
+    cached_export("with t as (select 1) select * from t", build, cache=cache)
+    cached_export("with t as (select 1) select * from t", build, cache=cache)
+    assert len(builds) == 4
+
+
+def test_concurrent_put_get_and_evict(tmp_path):
+    # Several export threads sharing one small cache, as in etl.export_fanout
+    cache = ExportCache(cache_dir=str(tmp_path), max_entries=2)
+    df = pd.DataFrame({"apn": [str(i) for i in range(200)]})
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(30):
+                key = ExportCache.make_key(n, i % 5)
+                cache.put(key, df)
+                cache.get(key)
+                cache.entries()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(cache.entries()) <= 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
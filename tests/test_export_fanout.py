@@ -0,0 +1,39 @@
+# Per-strategy export: tab formatting and the history insert overlap, with stub DB calls.
+import threading
+
+import pandas as pd
+
+from etl import gsheet, loader
+from etl.export_fanout import default_strategies, export_strategy
+from etl.sinks import MemorySink
+
+
+def test_format_and_history_run_concurrently(monkeypatch):
+    df = pd.DataFrame({"apn": ["1", "2"], "address": ["1 Main St", "2 Oak St"]})
+    monkeypatch.setattr(gsheet, "export_and_process_data", lambda query, use_cache=True: df)
+    both_running = threading.Barrier(2, timeout=5)
+    inserted = []
+
+    class SlowFormatSink(MemorySink):
+        def format(self, *args, **kwargs):
+            both_running.wait()  # times out unless the history insert is running too
+            super().format(*args, **kwargs)
+
+    def insert_uploaded_to_db(frame):
+        both_running.wait()
+        inserted.append(frame["apn"].tolist())
+
+    monkeypatch.setattr(loader, "insert_uploaded_to_db", insert_uploaded_to_db)
+    sink = SlowFormatSink()
+    summary = export_strategy(default_strategies()[0], sink)
+
+    assert summary["rows"] == 2
+    assert inserted == [["1", "2"]]
+    assert summary["tab_name"] in sink.tabs
+
+
+def test_no_history_skips_the_insert(monkeypatch):
+    df = pd.DataFrame({"apn": ["1"]})
+    monkeypatch.setattr(gsheet, "export_and_process_data", lambda query, use_cache=True: df)
+    monkeypatch.setattr(loader, "insert_uploaded_to_db", lambda frame: (_ for _ in ()).throw(AssertionError))
+    export_strategy(default_strategies()[0], MemorySink(), record_history=False)
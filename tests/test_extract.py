@@ -0,0 +1,36 @@
+# Extract renames: concurrent workers never pick the same normalized name.
+import os
+import threading
+import time
+
+from etl.extract import normalize_extract_path
+
+
+def test_concurrent_renames_keep_every_file(tmp_path, monkeypatch):
+    # Widen any check-then-rename window so a race shows up on every run
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, "exists", lambda p: (exists(p), time.sleep(0.05))[0])
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"propstream_export_{i}.csv"
+        path.write_text(f"apn\n{i}\n")
+        os.utime(path, (1_800_000_000, 1_800_000_000))  # same day for all
+        paths.append(str(path))
+
+    barrier = threading.Barrier(len(paths))
+    renamed = []
+
+    def worker(path):
+        barrier.wait()
+        renamed.append(normalize_extract_path(path)[0])
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in paths]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(renamed)) == len(paths)
+    contents = sorted(open(p).read() for p in renamed)
+    assert contents == sorted(f"apn\n{i}\n" for i in range(len(paths)))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in renamed)
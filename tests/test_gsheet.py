@@ -0,0 +1,38 @@
+# Export post-processing gives the same result chunk by chunk as on the whole frame.
+import datetime
+
+import pandas as pd
+
+from etl.gsheet import clean_export_dataframe, process_export_chunk
+
+
+def export_rows():
+    return pd.DataFrame({
+        "address": ["1 Main St", "2 Oak St", "3 Elm St", "4 Pine St"],
+        "city": ["Las Vegas"] * 4,
+        "state": ["NV"] * 4,
+        "zip": ["89101", "89102", "89103", "89104"],
+        "mls_amount": [1500.0, 250000.0, None, 1234567.4],
+        "price_per_sqft": [150.2, None, 99.5, 210.0],
+        "building_sqft": [1000, 1200, 1500, None],
+        "total_score": [71.26, 50.0, None, 88.04],
+        "mls_date": [datetime.date(2026, 1, 5), None, datetime.date(2026, 2, 1), None],
+    })
+
+
+def test_commas_do_not_depend_on_nulls():
+    out = clean_export_dataframe(export_rows())
+    assert out["mls_amount"].tolist() == ["1,500", "250,000", "", "1,234,567"]
+    assert out["building_sqft"].tolist() == ["1,000", "1,200", "1,500", ""]
+
+
+def test_chunked_processing_matches_whole_frame():
+    df = export_rows()
+    whole = process_export_chunk(df)
+    # Chunk 2 has no NULL mls_amount and no mls_date at all
+    chunked = pd.concat(
+        [process_export_chunk(df.iloc[[0, 3]]), process_export_chunk(df.iloc[[1, 2]])],
+        ignore_index=True,
+    )
+    chunked = chunked.set_index(chunked["address"]).loc[whole["address"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(chunked, whole, check_dtype=False)
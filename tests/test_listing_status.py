@@ -0,0 +1,126 @@
+# Listing status checker against a local stand-in HTTP server.
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from etl.listing_status import (
+    StatusCache,
+    add_listing_status_column,
+    check_listing_statuses,
+    parse_listing_status,
+)
+
+PAGES = {
+    "/homes/1-Main-St-Las-Vegas-NV-89101_rb/": (
+        200,
+        '<html><title>1 Main St</title><body><span data-testid="home-status">For sale</span>'
+        "<p>See nearby homes recently sold.</p></body></html>",
+    ),
+    "/homes/2-Oak-St-Las-Vegas-NV-89101_rb/": (
+        200,
+        '<html><body><div class="ds-status">Pending</div></body></html>',
+    ),
+    "/homes/3-Elm-St-Las-Vegas-NV-89101_rb/": (404, "<html>Not found</html>"),
+    "/homes/4-Pine-St-Las-Vegas-NV-89101_rb/": (503, "<html>Try again later</html>"),
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        StandInHandler.hits.append(self.path)
+        status, body = PAGES.get(self.path, (404, ""))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.hits = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/homes/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def check(slugs, cache, base_url, **kwargs):
+    return asyncio.run(
+        check_listing_statuses(slugs, cache=cache, base_url=base_url, per_host_interval=0, **kwargs)
+    )
+
+
+def test_active_pending_and_404(server, tmp_path):
+    cache = StatusCache(path=str(tmp_path / "cache.json"))
+    statuses = check(
+        ["1-Main-St-Las-Vegas-NV-89101", "2-Oak-St-Las-Vegas-NV-89101", "3-Elm-St-Las-Vegas-NV-89101"],
+        cache,
+        server,
+    )
+    assert statuses == {
+        "1-Main-St-Las-Vegas-NV-89101": "active",
+        "2-Oak-St-Las-Vegas-NV-89101": "pending",
+        "3-Elm-St-Las-Vegas-NV-89101": "off_market",
+    }
+
+
+def test_fresh_entries_are_reused_until_ttl(server, tmp_path):
+    path = str(tmp_path / "cache.json")
+    slug = "1-Main-St-Las-Vegas-NV-89101"
+    check([slug], StatusCache(path=path), server)
+    assert len(StandInHandler.hits) == 1
+
+    # Reloaded from disk and still fresh: no request
+    assert check([slug], StatusCache(path=path), server) == {slug: "active"}
+    assert len(StandInHandler.hits) == 1
+
+    # Expired: fetched again
+    check([slug], StatusCache(path=path, ttl_hours=0), server)
+    assert len(StandInHandler.hits) == 2
+
+
+def test_non_200_responses_are_not_cached(server, tmp_path):
+    cache = StatusCache(path=str(tmp_path / "cache.json"))
+    slug = "4-Pine-St-Las-Vegas-NV-89101"
+    assert check([slug], cache, server) == {slug: "unknown"}
+    assert slug not in cache.entries
+
+    check([slug], cache, server)
+    assert len(StandInHandler.hits) == 2
+
+
+def test_body_text_does_not_override_status():
+    html = "<html><body><h1>For sale</h1><p>See nearby homes recently sold.</p></body></html>"
+    assert parse_listing_status(html) == "unknown"
+
+
+def test_address_in_title_does_not_override_badge():
+    assert parse_listing_status(
+        '<html><title>1 Active St</title><body><div class="ds-status">Pending</div></body></html>'
+    ) == "pending"
+    assert parse_listing_status(
+        '<html><title>12 Sold Ct</title><body><span data-testid="home-status">For sale</span></body></html>'
+    ) == "active"
+
+
+def test_add_column_inside_running_loop(server, tmp_path):
+    df = pd.DataFrame({"address": ["1 Main St"], "city": ["Las Vegas"], "state": ["NV"], "zip": ["89101"]})
+
+    async def notebook_cell():
+        # Same situation as a Jupyter cell: an event loop is already running
+        return add_listing_status_column(
+            df, cache=StatusCache(path=str(tmp_path / "cache.json")), base_url=server, per_host_interval=0
+        )
+
+    out = asyncio.run(notebook_cell())
+    assert out["listing_status"].tolist() == ["active"]
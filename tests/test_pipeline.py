@@ -0,0 +1,86 @@
+# Stage runner: fingerprint skips, resume after a failure and --force, with stub stages.
+import pytest
+
+from etl import metrics
+from etl.pipeline import Pipeline, Stage
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_file(monkeypatch):
+    monkeypatch.setattr(metrics, "flush", lambda *args, **kwargs: None)
+
+
+def make_pipeline(tmp_path, source, calls, fail=()):
+    def stage(name, key, value):
+        def fn(inputs):
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError(f"{name} failed")
+            return {key: value(inputs)}
+        return fn
+
+    stages = [
+        Stage("extract", stage("extract", "raw", lambda _: source.read_text()),
+              outputs=["raw"], sources=lambda: [str(source)]),
+        Stage("transform", stage("transform", "clean", lambda i: i["raw"].upper()),
+              inputs=["raw"], outputs=["clean"]),
+        Stage("load", stage("load", "loaded", lambda i: {"rows": len(i["clean"])}),
+              inputs=["clean"], outputs=["loaded"]),
+    ]
+    return Pipeline(stages, state_dir=str(tmp_path / "state"))
+
+
+def test_unchanged_stages_are_skipped_and_source_changes_rerun(tmp_path):
+    source = tmp_path / "extract.csv"
+    source.write_text("a,b\n")
+    calls = []
+
+    assert make_pipeline(tmp_path, source, calls).run() == {
+        "extract": "ran", "transform": "ran", "load": "ran",
+    }
+    # New Pipeline object: state comes from disk
+    assert set(make_pipeline(tmp_path, source, calls).run().values()) == {"skipped"}
+    assert calls == ["extract", "transform", "load"]
+
+    source.write_text("a,b,c\n")
+    calls.clear()
+    make_pipeline(tmp_path, source, calls).run()
+    assert calls == ["extract", "transform", "load"]
+
+
+def test_failed_run_resumes_from_the_last_completed_stage(tmp_path):
+    source = tmp_path / "extract.csv"
+    source.write_text("a,b\n")
+    calls = []
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        make_pipeline(tmp_path, source, calls, fail={"load"}).run()
+    assert calls == ["extract", "transform", "load"]
+
+    calls.clear()
+    results = make_pipeline(tmp_path, source, calls).run()
+    assert results == {"extract": "skipped", "transform": "skipped", "load": "ran"}
+    assert calls == ["load"]
+
+
+def test_force_reruns_everything(tmp_path):
+    source = tmp_path / "extract.csv"
+    source.write_text("a,b\n")
+    calls = []
+    make_pipeline(tmp_path, source, calls).run()
+
+    calls.clear()
+    make_pipeline(tmp_path, source, calls).run(force=True)
+    assert calls == ["extract", "transform", "load"]
+
+
+def test_default_load_stage_fails_when_the_copy_fails(tmp_path, monkeypatch):
+    import pandas as pd
+    from etl import loader
+    from etl.pipeline import build_default_pipeline
+
+    # load_dataframe prints COPY errors and reports 0 rows loaded
+    monkeypatch.setattr(loader, "load_dataframe", lambda **kwargs: 0)
+    pipeline = build_default_pipeline(sink=object(), state_dir=str(tmp_path / "state"))
+    with pytest.raises(RuntimeError, match="Loaded 0 of 2 rows"):
+        pipeline.stages["load"].fn({"clean": pd.DataFrame({"apn": ["1", "2"]})})
@@ -0,0 +1,53 @@
+# Underwriting math against hand-computed values: 2 properties x 2 scenarios.
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.underwriting import monthly_payment, scenario_grid, to_frame, underwrite
+
+
+def props():
+    return pd.DataFrame({
+        "apn": ["A", "B"],
+        "building_sqft": [1000, 2000],
+        "mls_amount": [100_000, 300_000],
+        "est_value": [150_000, 280_000],
+        "total_loan_balance": [50_000, 250_000],
+    })
+
+
+def test_two_properties_two_scenarios():
+    scenarios = scenario_grid(rehab_per_sqft=[25, 50], interest_rate=0.06)
+    results = underwrite(props(), scenarios)
+
+    # Rows are scenarios, columns are properties
+    np.testing.assert_allclose(results["rehab_cost"], [[25_000, 50_000], [50_000, 100_000]])
+    # arv = est_value + sqft * 50
+    np.testing.assert_allclose(results["arv"], [[200_000, 380_000], [200_000, 380_000]])
+    # mao = arv * 0.70 - rehab
+    np.testing.assert_allclose(results["mao"], [[115_000, 216_000], [90_000, 166_000]])
+    # arv * 0.92 - purchase - 3% closing - rehab
+    np.testing.assert_allclose(results["flip_profit"], [[56_000, -9_400], [31_000, -59_400]])
+    # 75% of purchase over 30 years at 6%: $599.55 per $100k
+    np.testing.assert_allclose(results["monthly_payment"][0], [449.66, 1348.99], atol=0.01)
+    # rent 0.75% of arv, 45% expenses, minus P&I
+    assert results["monthly_cash_flow"][0, 0] == pytest.approx(1500 * 0.55 - 449.66, abs=0.01)
+    assert results["deal_flag"].tolist() == [[True, False], [False, False]]
+    assert results["mao_covers_liens"].tolist() == [[True, False], [True, False]]
+
+    df = to_frame(results, props(), scenarios)
+    assert list(zip(df["scenario_id"], df["apn"])) == [(0, "A"), (0, "B"), (1, "A"), (1, "B")]
+    assert df["mao"].tolist() == [115_000, 216_000, 90_000, 166_000]
+
+    deals = to_frame(results, props(), scenarios, deals_only=True)
+    assert list(zip(deals["scenario_id"], deals["apn"])) == [(0, "A")]
+
+
+def test_zero_rate_payment_is_straight_line():
+    assert monthly_payment(360_000, 0.0, 30) == pytest.approx(1000)
+    # Mixed rates in one array: the r == 0 branch doesn't leak NaN into the others
+    np.testing.assert_allclose(
+        monthly_payment(np.array([120_000.0, 120_000.0]), np.array([0.0, 0.06]), 10),
+        [1000, 1332.25],
+        atol=0.01,
+    )
@@ -0,0 +1,72 @@
+# Watch-folder ingest: a file renamed by its own (slow) ingest is loaded once.
+import os
+import threading
+import time
+
+from etl import metrics, watcher
+from etl.watcher import FolderWatcher, WatchState
+
+
+def test_renamed_file_is_not_ingested_twice(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "flush", lambda *args, **kwargs: None)
+    (tmp_path / "propstream_export.csv").write_text("apn,address\n1,1 Main St\n")
+    calls = []
+
+    def slow_renaming_ingest(path):
+        # Like load_extract_file: rename first, then spend a while loading
+        calls.append(os.path.basename(path))
+        clean_path = os.path.join(os.path.dirname(path), "20261019_extract.csv")
+        os.rename(path, clean_path)
+        time.sleep(3)
+        return 1, clean_path
+
+    w = FolderWatcher(
+        folder=str(tmp_path),
+        poll_interval=0.5,
+        settle_seconds=1,
+        max_workers=2,
+        state=WatchState(path=str(tmp_path / "state" / "watcher.json")),
+        ingest=slow_renaming_ingest,
+    )
+    thread = threading.Thread(target=w.run, daemon=True)
+    thread.start()
+    time.sleep(6)
+    w.stop()
+    thread.join(timeout=5)
+
+    assert calls == ["propstream_export.csv"]
+    assert len(w.state.ingested) == 1
+    assert not w.state.in_flight
+    assert os.path.join(str(tmp_path), "20261019_extract.csv") in w._handled
+
+
+def test_failed_ingest_releases_the_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "flush", lambda *args, **kwargs: None)
+    path = tmp_path / "20261019_extract.csv"
+    path.write_text("apn\n1\n")
+
+    def failing_ingest(p):
+        raise RuntimeError("db down")
+
+    w = FolderWatcher(folder=str(tmp_path), state=WatchState(path=str(tmp_path / "w.json")),
+                      ingest=failing_ingest)
+    st = path.stat()
+    w._process(str(path), (st.st_size, st.st_mtime))
+    assert not w.state.in_flight and not w.state.ingested
+    assert watcher.is_candidate(path.name)
+
+
+def test_failed_copy_is_not_marked_as_ingested(tmp_path, monkeypatch):
+    from etl import loader
+
+    monkeypatch.setattr(metrics, "flush", lambda *args, **kwargs: None)
+    # load_dataframe prints COPY errors and reports 0 rows loaded
+    monkeypatch.setattr(loader, "load_dataframe", lambda **kwargs: 0)
+    path = tmp_path / "20261019_extract.csv"
+    path.write_text("APN,Address,City,State,Zip\n1,1 Main St,Las Vegas,NV,89101\n")
+
+    w = FolderWatcher(folder=str(tmp_path), state=WatchState(path=str(tmp_path / "w.json")))
+    st = path.stat()
+    w._process(str(path), (st.st_size, st.st_mtime))
+    assert not w.state.ingested and not w.state.in_flight
+    assert str(path) not in w._handled